@@ -11,7 +11,16 @@
 Search Gmail for job rejection emails and extract dates.
 
 Usage:
-    uv run gmail_rejection_search.py
+    uv run gmail_rejection_search.py [--since YYYY-MM-DD] [--window-months N]
+    uv run gmail_rejection_search.py --offline      # cached results, no API calls
+    uv run gmail_rejection_search.py --full-sync    # rebuild the cache
+
+Matches are cached in mailbox.sqlite next to this script. The first run does
+a full search; later runs only fetch what changed since (users.history).
+
+The rejection phrases are packed into a few OR queries and split into
+date windows (--window-months each, from --since to now, plus one window
+for everything older), which are searched concurrently and paged to the end.
 
 First run:
 1. Download credentials.json from Google Cloud Console
@@ -20,14 +29,25 @@ First run:
 4. A browser will open for authorization (first time only)
 """
 
+import argparse
+import json
 import os
 import pickle
-from datetime import datetime
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 # If modifying scopes, delete token.pickle
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
@@ -35,6 +55,45 @@ SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 # Directory where this script lives
 SCRIPT_DIR = Path(__file__).parent
 
+CACHE_PATH = SCRIPT_DIR / 'mailbox.sqlite'
+# New mail can take a while to become searchable, so incremental searches
+# reach this far back (seconds)
+SEARCH_INDEX_LAG = 86400
+
+METADATA_HEADERS = ['Date', 'Subject', 'From']
+
+# Batched metadata fetch. Gmail accepts up to 100 calls per batch but
+# recommends 50, as bigger batches tend to hit per-user rate limits.
+BATCH_SIZE = 50
+MAX_BATCH_SIZE = 100
+BATCH_WORKERS = 4          # batches in flight at once
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Common rejection phrases in subject or body
+REJECTION_QUERIES = [
+    'subject:(unfortunately application)',
+    'subject:(regret to inform)',
+    'subject:(not moving forward)',
+    'subject:(unsuccessful application)',
+    'subject:(application status)',
+    'subject:(thank you for your interest) -interview',
+    '"we have decided to move forward with other candidates"',
+    '"unfortunately we will not be moving forward"',
+    '"regret to inform you"',
+    '"not selected for"',
+    '"decided not to proceed"',
+    '"position has been filled"',
+]
+
+# Query planning. Gmail doesn't document a limit on q; long queries are
+# sent in the URL, so merged queries are kept well short of URL limits.
+MAX_QUERY_LENGTH = 1000
+WINDOW_MONTHS = 6          # each date shard covers this many months
+DEFAULT_YEARS = 3          # windows start this far back; older mail is one shard
+PAGE_SIZE = 500            # Gmail's maximum for messages.list
+SEARCH_WORKERS = 4         # shards searched at once
+
 def get_gmail_service():
     """Authenticate and return Gmail API service."""
     creds = None
@@ -65,63 +124,199 @@ def get_gmail_service():
     return build('gmail', 'v1', credentials=creds)
 
 
-def search_rejection_emails(service, max_results=50):
-    """Search for job rejection emails."""
-
-    # Common rejection phrases in subject or body
-    rejection_queries = [
-        'subject:(unfortunately application)',
-        'subject:(regret to inform)',
-        'subject:(not moving forward)',
-        'subject:(unsuccessful application)',
-        'subject:(application status)',
-        'subject:(thank you for your interest) -interview',
-        '"we have decided to move forward with other candidates"',
-        '"unfortunately we will not be moving forward"',
-        '"regret to inform you"',
-        '"not selected for"',
-        '"decided not to proceed"',
-        '"position has been filled"',
-    ]
-
-    all_messages = []
-    seen_ids = set()
+def merge_queries(terms, max_length=MAX_QUERY_LENGTH):
+    """Pack search terms into as few OR-combined queries as fit max_length.
+
+    Terms are placed largest first into the first query with room for them;
+    a term longer than max_length gets a query of its own.
+    """
+    groups = []
+    for term in sorted(terms, key=len, reverse=True):
+        part = f"({term})"
+        for group in groups:
+            if len(" OR ".join(group + [part])) <= max_length:
+                group.append(part)
+                break
+        else:
+            groups.append([part])
+    return [" OR ".join(group) for group in groups]
+
+
+def shift_months(dt, months):
+    """dt moved by a number of months (day clamped to 28 to stay valid)."""
+    month = dt.month - 1 + months
+    return dt.replace(year=dt.year + month // 12, month=month % 12 + 1, day=min(dt.day, 28))
+
+
+def date_windows(since, until, months=WINDOW_MONTHS):
+    """Gmail date filters covering all time, newest first.
+
+    Windows of `months` run from `since` to `until`; the newest is open-ended
+    (catches mail arriving mid-search) and a last one covers everything before
+    `since`. Bounds are epoch seconds, overlapping by a second so a message
+    on a boundary isn't lost (duplicates are dropped anyway).
+    """
+    bounds = [until]
+    while bounds[-1] > since:
+        bounds.append(max(shift_months(bounds[-1], -months), since))
+    stamps = [int(b.timestamp()) for b in bounds]
+
+    windows = []
+    for i in range(len(stamps) - 1):
+        after = f"after:{stamps[i + 1] - 1}"
+        windows.append(after if i == 0 else f"{after} before:{stamps[i]}")
+    windows.append(f"before:{stamps[-1]}")
+    return windows
 
-    print("Searching for rejection emails...")
 
-    for query in rejection_queries:
+def plan_queries(terms=REJECTION_QUERIES, since=None, until=None, months=WINDOW_MONTHS):
+    """Search shards: each merged OR query crossed with each date window."""
+    until = until or datetime.now(timezone.utc)
+    since = since or shift_months(until, -12 * DEFAULT_YEARS)
+    return [f"({query}) {window}"
+            for query in merge_queries(terms)
+            for window in date_windows(since, until, months)]
+
+
+def execute_with_retry(request, http=None):
+    """request.execute(), retrying rate limits and transient errors with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
         try:
-            results = service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=max_results
-            ).execute()
-
-            messages = results.get('messages', [])
-            for msg in messages:
-                if msg['id'] not in seen_ids:
-                    seen_ids.add(msg['id'])
-                    all_messages.append(msg)
+            return request.execute(http=http)
+        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+            if attempt == MAX_RETRIES or (isinstance(e, HttpError) and not is_retryable(e)):
+                raise
+            time.sleep(min(2 ** attempt, 32) + random.random())
+
+
+def search_shard(service, query, on_page, http=None, max_results=None):
+    """Page through every result of one query, passing each page to on_page.
+
+    Pages that fail with a rate limit or 5xx are retried with backoff.
+    Returns stats for the coverage report.
+    """
+    stats = {'query': query, 'pages': 0, 'messages': 0, 'complete': False, 'error': None}
+    page_token = None
+    while True:
+        request = service.users().messages().list(
+            userId='me', q=query, maxResults=PAGE_SIZE, pageToken=page_token)
+        try:
+            results = execute_with_retry(request, http)
+        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+            stats['error'] = getattr(e, 'reason', None) or str(e)
+            return stats
+
+        messages = results.get('messages', [])
+        stats['pages'] += 1
+        stats['messages'] += len(messages)
+        on_page(messages)
+
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            stats['complete'] = True
+            return stats
+        if max_results and stats['messages'] >= max_results:
+            return stats
+
+
+def iter_rejection_emails(service, shards, coverage, max_results=None,
+                          workers=SEARCH_WORKERS):
+    """Search shards concurrently, yielding each message once as pages arrive.
+
+    Per-shard stats are appended to coverage as shards finish.
+    """
+    pages = queue.Queue()
+    local = threading.local()
+
+    def run(query):
+        if not hasattr(local, 'http'):
+            local.http = worker_http(service)
+        try:
+            stats = search_shard(service, query, pages.put, local.http, max_results)
         except Exception as e:
-            print(f"  Query failed: {query[:50]}... - {e}")
+            stats = {'query': query, 'pages': 0, 'messages': 0, 'complete': False, 'error': str(e)}
+        pages.put(stats)
 
+    seen_ids = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for query in shards:
+            pool.submit(run, query)
+        finished = 0
+        while finished < len(shards):
+            item = pages.get()
+            if isinstance(item, dict):
+                coverage.append(item)
+                finished += 1
+                continue
+            for msg in item:
+                if msg['id'] not in seen_ids:
+                    seen_ids.add(msg['id'])
+                    yield msg
+
+
+def short_query(query, width=72):
+    """query shortened in the middle, keeping its date window visible."""
+    if len(query) <= width:
+        return query
+    return f"{query[:width // 2 - 2]} ... {query[-(width // 2 - 3):]}"
+
+
+def print_coverage(coverage, unique):
+    """Say how much of the search space was actually covered."""
+    pages = sum(s['pages'] for s in coverage)
+    total = sum(s['messages'] for s in coverage)
+    print(f"Searched {len(coverage)} shards ({pages} pages): {unique} unique emails, "
+          f"{total - unique} duplicates across shards")
+
+    failed = [s for s in coverage if s['error']]
+    capped = [s for s in coverage if not s['complete'] and not s['error']]
+    if not failed and not capped:
+        print("Coverage: complete (every shard paged to the end)")
+    for s in failed:
+        print(f"  ✗ Shard failed after {s['pages']} pages: {short_query(s['query'])} - {s['error']}")
+    for s in capped:
+        print(f"  ! Stopped at {s['messages']} results (max_results): {short_query(s['query'])}")
+    if failed or capped:
+        print(f"Coverage: INCOMPLETE ({len(failed)} failed, {len(capped)} capped shards)")
+
+
+def search_rejection_emails(service, max_results=None, since=None, months=WINDOW_MONTHS,
+                            coverage=None):
+    """Search for job rejection emails.
+
+    Runs the planned shards concurrently and pages through all results
+    (max_results, if set, caps each shard). Prints a coverage report; pass a
+    list as coverage to get the per-shard stats.
+    """
+    shards = plan_queries(since=since, months=months)
+    print(f"Searching for rejection emails ({len(REJECTION_QUERIES)} phrases "
+          f"in {len(shards)} query/date-window shards)...")
+
+    coverage = [] if coverage is None else coverage
+    all_messages = list(iter_rejection_emails(service, shards, coverage, max_results))
+
+    print_coverage(coverage, len(all_messages))
     print(f"Found {len(all_messages)} potential rejection emails\n")
     return all_messages
 
 
-def get_email_details(service, msg_id):
-    """Get email date, subject, and sender."""
-    msg = service.users().messages().get(
+def metadata_request(service, msg_id):
+    """messages.get request for the headers we display."""
+    return service.users().messages().get(
         userId='me',
         id=msg_id,
         format='metadata',
-        metadataHeaders=['Date', 'Subject', 'From']
-    ).execute()
+        metadataHeaders=METADATA_HEADERS
+    )
 
-    headers = {h['name']: h['value'] for h in msg['payload']['headers']}
 
-    # Parse date
-    date_str = headers.get('Date', '')
+def get_email_details(service, msg_id):
+    """Get email date, subject, and sender."""
+    return parse_email_details(metadata_request(service, msg_id).execute())
+
+
+def parse_date(date_str):
+    """datetime from a Date header, or None if it can't be parsed."""
     try:
         # Handle various date formats
         for fmt in [
@@ -138,40 +333,336 @@ def get_email_details(service, msg_id):
             date = None
     except Exception:
         date = None
+    return date
+
+
+def parse_email_details(msg):
+    """Date, subject, sender, and labels from a metadata-format message."""
+    headers = {h['name']: h['value'] for h in msg['payload']['headers']}
+    date_str = headers.get('Date', '')
 
     return {
-        'id': msg_id,
-        'date': date,
+        'id': msg['id'],
+        'date': parse_date(date_str),
         'date_str': date_str,
         'subject': headers.get('Subject', '(no subject)'),
         'from': headers.get('From', '(unknown)'),
+        'thread_id': msg.get('threadId'),
+        'snippet': msg.get('snippet', ''),
+        'labels': msg.get('labelIds', []),
+        'internal_date': int(msg.get('internalDate', 0)),
     }
 
 
+def is_retryable(error):
+    """True for rate limiting and transient server errors."""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status in RETRY_STATUSES:
+        return True
+    # Gmail also reports per-user rate limits as 403 rateLimitExceeded
+    content = getattr(error, 'content', b'') or b''
+    return status == 403 and b'ratelimitexceeded' in content.lower()
+
+
+def worker_http(service):
+    """A separate authorized Http for a worker thread (httplib2 isn't thread-safe).
+
+    Returns None if the service wasn't built from credentials, in which case
+    batches use the service's own http.
+    """
+    credentials = getattr(service._http, 'credentials', None)
+    if credentials is None:
+        return None
+    return AuthorizedHttp(credentials, http=httplib2.Http())
+
+
+def execute_batch(service, msg_ids, http=None):
+    """Fetch metadata for msg_ids in one batch call.
+
+    Returns (details by id, ids worth retrying, {id: error} for the rest).
+    """
+    fetched, retry, failed = {}, [], {}
+
+    def callback(request_id, response, exception):
+        if exception is None:
+            fetched[request_id] = parse_email_details(response)
+        elif is_retryable(exception):
+            retry.append(request_id)
+        else:
+            failed[request_id] = exception
+
+    batch = service.new_batch_http_request(callback=callback)
+    for msg_id in msg_ids:
+        batch.add(metadata_request(service, msg_id), request_id=msg_id)
+    try:
+        batch.execute(http=http)
+    except (HttpError, httplib2.HttpLib2Error, OSError):
+        # The batch call itself failed (network, batch-level 429): retry
+        # whatever didn't come back
+        retry = [m for m in msg_ids if m not in fetched and m not in failed]
+    return fetched, retry, failed
+
+
+def fetch_email_details(service, msg_ids, batch_size=BATCH_SIZE,
+                        workers=BATCH_WORKERS, max_retries=MAX_RETRIES):
+    """Get details for many emails using Gmail batch requests.
+
+    Ids go out in batches of up to batch_size (at most 100), with up to
+    `workers` batches in flight. Messages that come back rate limited or with
+    a 5xx are retried on their own, with exponential backoff; other failures
+    are reported and skipped. Returns {msg_id: details}.
+    """
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    pending = list(dict.fromkeys(msg_ids))
+    total = len(pending)
+    details = {}
+    failed = {}
+    local = threading.local()
+
+    def run(chunk):
+        if not hasattr(local, 'http'):
+            local.http = worker_http(service)
+        return execute_batch(service, chunk, local.http)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                delay = min(2 ** attempt, 32) + random.random()
+                print(f"  Retrying {len(pending)} messages in {delay:.1f}s...")
+                time.sleep(delay)
+
+            chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            pending = []
+            for fetched, retry, errors in pool.map(run, chunks):
+                details.update(fetched)
+                pending.extend(retry)
+                failed.update(errors)
+                print(f"  Fetched {len(details)}/{total}...")
+
+    for msg_id in pending:
+        failed[msg_id] = 'still failing after retries'
+    if failed:
+        print(f"  Could not fetch {len(failed)} emails:")
+        for msg_id, error in list(failed.items())[:5]:
+            print(f"    {msg_id}: {getattr(error, 'reason', error)}")
+
+    return details
+
+
+class MailboxCache:
+    """SQLite cache of the messages the rejection search matches.
+
+    A full sync runs the planned search and stores metadata for every match,
+    along with the mailbox historyId. Later syncs read users.history from
+    that ID: deletions and label changes are applied directly, and the
+    search is re-run over recent mail only when new mail has arrived. An
+    expired history ID (or a changed REJECTION_QUERIES) means a full sync.
+    Matches whose details couldn't be fetched are kept in meta and retried
+    by the next sync, so a failed batch never drops them for good.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            id TEXT PRIMARY KEY,
+            thread_id TEXT,
+            internal_date INTEGER,
+            date_str TEXT,
+            sender TEXT,
+            subject TEXT,
+            snippet TEXT,
+            labels TEXT
+        );
+        CREATE INDEX IF NOT EXISTS messages_date ON messages(internal_date);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+
+    def __init__(self, path=CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+
+    def get(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def store(self, emails):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(e['id'], e['thread_id'], e['internal_date'], e['date_str'], e['from'],
+              e['subject'], e['snippet'], json.dumps(e['labels'])) for e in emails])
+
+    def cached_ids(self):
+        return {row[0] for row in self.conn.execute("SELECT id FROM messages")}
+
+    def unfetched(self):
+        return json.loads(self.get('unfetched', '[]'))
+
+    def fetch(self, service, msg_ids):
+        """fetch_email_details, remembering the ids that failed for next time."""
+        details = fetch_email_details(service, msg_ids) if msg_ids else {}
+        missing = [i for i in msg_ids if i not in details]
+        if missing:
+            print(f"  {len(missing)} emails will be retried on the next sync")
+        return details, missing
+
+    def emails(self, text=None):
+        """Cached emails, newest first, leaving out trash and spam like Gmail
+        search does. text filters on subject, sender, and snippet."""
+        sql = ("SELECT id, date_str, subject, sender, thread_id, snippet, labels, internal_date "
+               "FROM messages WHERE labels NOT LIKE '%\"TRASH\"%' AND labels NOT LIKE '%\"SPAM\"%'")
+        params = []
+        if text:
+            sql += " AND (subject LIKE ? OR sender LIKE ? OR snippet LIKE ?)"
+            params = [f"%{text}%"] * 3
+        sql += " ORDER BY internal_date DESC"
+        return [{
+            'id': msg_id, 'date': parse_date(date_str), 'date_str': date_str,
+            'subject': subject, 'from': sender, 'thread_id': thread_id,
+            'snippet': snippet, 'labels': json.loads(labels), 'internal_date': internal_date,
+        } for msg_id, date_str, subject, sender, thread_id, snippet, labels, internal_date
+            in self.conn.execute(sql, params)]
+
+    def sync(self, service, since=None, months=WINDOW_MONTHS, full=False):
+        """Bring the cache up to date, incrementally when possible."""
+        started = time.time()
+        plan = "\n".join(REJECTION_QUERIES)
+        if full or not self.get('history_id') or self.get('plan') != plan:
+            self.full_sync(service, since, months)
+        elif not self.delta_sync(service):
+            print("History ID expired, doing a full sync")
+            self.full_sync(service, since, months)
+        print(f"Cache synced in {time.time() - started:.2f}s ({CACHE_PATH.name})\n")
+
+    def full_sync(self, service, since=None, months=WINDOW_MONTHS):
+        started = int(time.time())
+        # Read the history ID first so changes made during the sync are
+        # picked up by the next delta
+        history_id = execute_with_retry(service.users().getProfile(userId='me'))['historyId']
+
+        coverage = []
+        messages = search_rejection_emails(service, since=since, months=months, coverage=coverage)
+        print("Fetching email details...")
+        details, missing = self.fetch(service, [msg['id'] for msg in messages])
+
+        complete = all(s['complete'] for s in coverage)
+        with self.conn:
+            self.conn.execute("DELETE FROM messages")
+            self.store(details.values())
+            self.set('unfetched', json.dumps(missing))
+            # An incomplete search leaves no history ID, so the next run
+            # tries a full sync again instead of building on a partial one
+            self.set('history_id', history_id if complete else '')
+            self.set('plan', "\n".join(REJECTION_QUERIES))
+            self.set('search_from', started - SEARCH_INDEX_LAG)
+            self.set('last_added', started)
+        print(f"Full sync: cached {len(details)} emails")
+
+    def delta_sync(self, service):
+        """Apply changes since the stored history ID. False if it has expired."""
+        start_id = history_id = self.get('history_id')
+        added, deleted, relabeled = set(), set(), {}
+        page_token = None
+        try:
+            while True:
+                results = execute_with_retry(service.users().history().list(
+                    userId='me', startHistoryId=start_id, historyTypes=self.HISTORY_TYPES,
+                    maxResults=PAGE_SIZE, pageToken=page_token))
+                for record in results.get('history', []):
+                    for item in record.get('messagesAdded', []):
+                        added.add(item['message']['id'])
+                    for item in record.get('messagesDeleted', []):
+                        msg_id = item['message']['id']
+                        deleted.add(msg_id)
+                        added.discard(msg_id)
+                        relabeled.pop(msg_id, None)
+                    for item in record.get('labelsAdded', []) + record.get('labelsRemoved', []):
+                        # message.labelIds is the full set after the change
+                        relabeled[item['message']['id']] = item['message'].get('labelIds', [])
+                history_id = results.get('historyId', history_id)
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as e:
+            if e.resp.status == 404:
+                return False
+            raise
+
+        now = int(time.time())
+        last_added = now if added else int(self.get('last_added', 0))
+        retry = [i for i in self.unfetched() if i not in deleted]
+        found = []
+        search_complete = True
+        # Search again while new mail may still be getting indexed
+        if now - last_added < SEARCH_INDEX_LAG:
+            search_from = int(self.get('search_from', 0))
+            shards = [f"({query}) after:{search_from}" for query in merge_queries(REJECTION_QUERIES)]
+            coverage = []
+            cached = self.cached_ids()
+            found = [msg['id'] for msg in iter_rejection_emails(service, shards, coverage)
+                     if msg['id'] not in cached]
+            search_complete = all(s['complete'] for s in coverage)
+            if not search_complete:
+                print_coverage(coverage, len(found))
+        if retry:
+            print(f"Retrying {len(retry)} emails that failed to fetch last time")
+        new, missing = self.fetch(service, list(dict.fromkeys(retry + found)))
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM messages WHERE id = ?", [(i,) for i in deleted])
+            self.conn.executemany("UPDATE messages SET labels = ? WHERE id = ?",
+                                  [(json.dumps(labels), i) for i, labels in relabeled.items()])
+            self.store(new.values())
+            self.set('unfetched', json.dumps(missing))
+            self.set('history_id', history_id)
+            self.set('last_added', last_added)
+            if search_complete and now - last_added < SEARCH_INDEX_LAG:
+                self.set('search_from', now - SEARCH_INDEX_LAG)
+        print(f"Delta sync: {len(added)} new in mailbox, {len(new)} new matches, "
+              f"{len(deleted)} deleted, {len(relabeled)} relabeled")
+        return True
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Search Gmail for job rejection emails")
+    parser.add_argument("--since", type=lambda d: datetime.strptime(d, "%Y-%m-%d").replace(tzinfo=timezone.utc),
+                        help=f"Start of the dated search windows (default: {DEFAULT_YEARS} years ago; "
+                             "older mail is still searched as one shard)")
+    parser.add_argument("--window-months", type=int, default=WINDOW_MONTHS,
+                        help=f"Months per date shard (default: {WINDOW_MONTHS})")
+    parser.add_argument("--offline", action="store_true",
+                        help="Show cached results without calling the API")
+    parser.add_argument("--full-sync", action="store_true",
+                        help="Rebuild the cache with a full search")
+    args = parser.parse_args()
+    if args.window_months < 1:
+        parser.error("--window-months must be at least 1")
+
     print("=" * 60)
     print("Gmail Rejection Email Search")
     print("=" * 60 + "\n")
 
-    service = get_gmail_service()
-    if not service:
+    cache = MailboxCache()
+    if args.offline and not cache.get('plan'):
+        print("The cache is empty; run once without --offline to fill it.")
         return
+    if not args.offline:
+        service = get_gmail_service()
+        if not service:
+            return
+        cache.sync(service, since=args.since, months=args.window_months, full=args.full_sync)
 
-    messages = search_rejection_emails(service)
+    emails = cache.emails()
 
-    if not messages:
+    if not emails:
         print("No rejection emails found.")
         return
 
-    # Get details for each message
-    emails = []
-    print("Fetching email details...")
-    for i, msg in enumerate(messages):
-        if i % 10 == 0:
-            print(f"  Processing {i+1}/{len(messages)}...")
-        details = get_email_details(service, msg['id'])
-        emails.append(details)
-
     # Sort by date (newest first)
     emails.sort(key=lambda x: x['date'] or datetime.min, reverse=True)
 
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.11"
+# dependencies = []
+# ///
+"""
+Lazy-start multiplexing MCP proxy for the servers in the canonical config.
+
+Agents configure this one stdio MCP server (mcp-sync --proxy) instead of
+every server in ~/agent-config/mcp-servers.json. It answers tools/list from
+a cached manifest, so session startup launches nothing, and starts a backend
+server only when one of its tools is first called. Backends live in a shared
+daemon reached over a Unix socket: a warm server is reused by every agent
+session and stopped after sitting idle. Tool names are "<server>__<tool>".
+
+Usage:
+  uv run ~/scripts/mcp-proxy.py                      # stdio MCP server (what agents run)
+  uv run ~/scripts/mcp-proxy.py --refresh-manifest   # cache tools of new/changed servers
+  uv run ~/scripts/mcp-proxy.py --refresh-manifest --all
+  uv run ~/scripts/mcp-proxy.py --probe [--json]     # start every server, time its handshake
+  uv run ~/scripts/mcp-proxy.py --status             # warm backends in the daemon
+  uv run ~/scripts/mcp-proxy.py --stop               # stop the daemon and its backends
+
+Environment:
+  MCP_PROXY_IDLE   seconds before an unused backend (and then the daemon) stops (default 600)
+"""
+
+import argparse
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Paths
+CANONICAL_CONFIG = Path.home() / "agent-config" / "mcp-servers.json"
+STATE_DIR = Path.home() / ".cache" / "mcp-sync"
+MANIFEST_FILE = STATE_DIR / "manifest.json"
+SOCKET_PATH = STATE_DIR / "proxy.sock"
+LOCK_FILE = STATE_DIR / "proxy.lock"
+LOG_FILE = STATE_DIR / "proxy.log"
+
+IDLE_SECONDS = int(os.environ.get("MCP_PROXY_IDLE", "600"))
+STARTUP_TIMEOUT = 60       # spawn + initialize (npx/uvx may download on first run)
+CALL_TIMEOUT = 300
+PROBE_TIMEOUT = 30         # --probe: per server, for the handshake and each request
+DAEMON_START_TIMEOUT = 10
+
+PROTOCOL_VERSION = "2024-11-05"
+SEPARATOR = "__"
+
+
+def load_servers() -> dict:
+    """mcpServers from the canonical config."""
+    with open(CANONICAL_CONFIG) as f:
+        return json.load(f).get("mcpServers", {})
+
+
+def server_digest(server: dict) -> str:
+    """Stable SHA-256 of one server's config; the manifest is keyed on it."""
+    return hashlib.sha256(json.dumps(server, sort_keys=True).encode()).hexdigest()
+
+
+def log(msg: str) -> None:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOG_FILE, "a") as f:
+        f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{os.getpid()}] {msg}\n")
+
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"servers": {}}
+
+
+def save_manifest(manifest: dict) -> None:
+    """Write the manifest atomically (temp file + rename)."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=STATE_DIR, prefix=".manifest.", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_FILE)
+
+
+class BackendError(Exception):
+    """A JSON-RPC error returned by a backend (forwarded to the client as-is)."""
+
+    def __init__(self, error: dict):
+        super().__init__(error.get("message", "backend error"))
+        self.error = error
+
+
+class Backend:
+    """One MCP server subprocess speaking newline-delimited JSON-RPC over stdio.
+
+    Started on first use; requests from any thread are matched to responses
+    by id. Requests the server sends to us (sampling, roots) are declined,
+    notifications dropped.
+    """
+
+    def __init__(self, name: str, server: dict):
+        self.name = name
+        self.server = server
+        self.proc = None
+        self.started_at = None
+        self.last_used = time.monotonic()
+        self.active = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count(1)
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def ensure_started(self, timeout: float = STARTUP_TIMEOUT) -> None:
+        with self._lock:
+            if self.alive():
+                return
+            env = dict(os.environ)
+            env.update({k: os.path.expandvars(v) for k, v in self.server.get("env", {}).items()})
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(LOG_FILE, "ab") as stderr:
+                self.proc = subprocess.Popen(
+                    [self.server.get("command", ""), *self.server.get("args", [])],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr,
+                    env=env, start_new_session=True,
+                )
+            threading.Thread(target=self._read, args=(self.proc,), daemon=True).start()
+            self.started_at = time.monotonic()
+            try:
+                self._request("initialize", {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "mcp-proxy", "version": "1.0"},
+                }, timeout)
+                self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            except Exception:
+                self._kill()
+                raise
+            log(f"started {self.name} in {time.monotonic() - self.started_at:.1f}s")
+
+    def _send(self, message: dict) -> None:
+        data = (json.dumps(message) + "\n").encode()
+        with self._write_lock:
+            self.proc.stdin.write(data)
+            self.proc.stdin.flush()
+
+    def _request(self, method: str, params: dict, timeout: float):
+        request_id = next(self._ids)
+        slot = {"event": threading.Event()}
+        self._pending[request_id] = slot
+        try:
+            try:
+                self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+            except OSError as e:
+                raise RuntimeError(f"{self.name} is not running: {e}")
+            if not slot["event"].wait(timeout):
+                raise TimeoutError(f"{self.name}: {method} timed out after {timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+        message = slot.get("message")
+        if message is None:
+            raise RuntimeError(f"{self.name} exited during {method}")
+        if "error" in message:
+            raise BackendError(message["error"])
+        return message.get("result")
+
+    def _read(self, proc) -> None:
+        for line in proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # stray non-protocol output
+            if "method" in message:
+                if "id" in message:
+                    self._send({"jsonrpc": "2.0", "id": message["id"], "error": {
+                        "code": -32601, "message": "Not supported through mcp-proxy"}})
+                continue
+            slot = self._pending.get(message.get("id"))
+            if slot:
+                slot["message"] = message
+                slot["event"].set()
+        # EOF: the process is gone, wake anyone still waiting
+        for slot in list(self._pending.values()):
+            slot["event"].set()
+
+    def call(self, method: str, params: dict, timeout: float = CALL_TIMEOUT):
+        """Send a request, starting the server first if needed."""
+        self.active += 1
+        try:
+            self.ensure_started()
+            return self._request(method, params, timeout)
+        finally:
+            self.active -= 1
+            self.last_used = time.monotonic()
+
+    def list_tools(self, timeout: float = CALL_TIMEOUT) -> list[dict]:
+        tools = []
+        cursor = None
+        while True:
+            result = self.call("tools/list", {"cursor": cursor} if cursor else {}, timeout) or {}
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    def _kill(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.terminate()
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._kill()
+
+
+# --- Shared daemon ---------------------------------------------------------
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = {"result": self.server.dispatch(request)}
+        except BackendError as e:
+            reply = {"error": e.error}
+        except Exception as e:
+            reply = {"error": {"code": -32603, "message": f"{type(e).__name__}: {e}"}}
+        self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class ProxyDaemon(socketserver.ThreadingUnixStreamServer):
+    """Owns the backends; one request per connection, newline-delimited JSON."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path):
+        self.backends = {}
+        self.last_activity = time.monotonic()
+        self._lock = threading.Lock()
+        super().__init__(str(path), _DaemonHandler)
+
+    def backend(self, name: str) -> Backend:
+        # Re-read the config so edits apply without restarting the daemon
+        servers = load_servers()
+        if name not in servers:
+            raise ValueError(f"unknown server: {name}")
+        with self._lock:
+            backend = self.backends.get(name)
+            if backend and backend.server != servers[name]:
+                log(f"config changed, restarting {name}")
+                backend.stop()
+                backend = None
+            if backend is None:
+                backend = self.backends[name] = Backend(name, servers[name])
+        return backend
+
+    def dispatch(self, request: dict):
+        self.last_activity = time.monotonic()
+        op = request.get("op")
+        if op == "ping":
+            return "pong"
+        if op == "call":
+            return self.backend(request["server"]).call(request["method"], request.get("params", {}))
+        if op == "tools":
+            return self.backend(request["server"]).list_tools()
+        if op == "status":
+            now = time.monotonic()
+            return {
+                name: {"running": b.alive(), "active": b.active,
+                       "idle_seconds": round(now - b.last_used),
+                       "uptime_seconds": round(now - b.started_at) if b.alive() else None}
+                for name, b in self.backends.items()
+            }
+        if op == "stop":
+            threading.Thread(target=self.stop_all).start()
+            return "stopping"
+        raise ValueError(f"unknown op: {op}")
+
+    def reap(self) -> None:
+        """Stop backends idle for IDLE_SECONDS; exit once nothing is running."""
+        while True:
+            time.sleep(min(10, IDLE_SECONDS))
+            now = time.monotonic()
+            for backend in list(self.backends.values()):
+                if backend.alive() and not backend.active and now - backend.last_used > IDLE_SECONDS:
+                    log(f"evicting idle {backend.name}")
+                    backend.stop()
+            running = any(b.alive() for b in self.backends.values())
+            if not running and now - self.last_activity > IDLE_SECONDS:
+                log("idle, daemon exiting")
+                self.stop_all()
+                return
+
+    def stop_all(self) -> None:
+        for backend in list(self.backends.values()):
+            backend.stop()
+        self.shutdown()
+
+
+def daemon_request(request: dict, timeout: float = CALL_TIMEOUT + STARTUP_TIMEOUT):
+    """Send one request to the daemon; raises OSError if it isn't running."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(SOCKET_PATH))
+        sock.sendall((json.dumps(request) + "\n").encode())
+        line = sock.makefile("rb").readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    reply = json.loads(line)
+    if "error" in reply:
+        raise BackendError(reply["error"])
+    return reply["result"]
+
+
+def daemon_running() -> bool:
+    try:
+        return daemon_request({"op": "ping"}, timeout=2) == "pong"
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_daemon() -> None:
+    """Start the shared daemon unless one is already answering."""
+    if daemon_running():
+        return
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # one spawner at a time
+        if daemon_running():
+            return
+        with open(LOG_FILE, "ab") as stderr:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--daemon"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr,
+                start_new_session=True,
+            )
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if daemon_running():
+                return
+            time.sleep(0.05)
+    raise RuntimeError(f"mcp-proxy daemon did not start (see {LOG_FILE})")
+
+
+def run_daemon() -> None:
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    if SOCKET_PATH.exists():
+        if daemon_running():
+            return
+        SOCKET_PATH.unlink()  # stale socket from a crashed daemon
+    server = ProxyDaemon(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    log(f"daemon listening on {SOCKET_PATH}")
+    threading.Thread(target=server.reap, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            SOCKET_PATH.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# --- Manifest --------------------------------------------------------------
+
+
+def probe_tools(name: str, server: dict) -> tuple[list[dict], float]:
+    """Launch a server once, list its tools, stop it. Returns (tools, seconds)."""
+    backend = Backend(name, server)
+    start = time.monotonic()
+    try:
+        return backend.list_tools(), time.monotonic() - start
+    finally:
+        backend.stop()
+
+
+def probe_server(name: str, server: dict, timeout: float = PROBE_TIMEOUT) -> dict:
+    """Cold-start one server and time it.
+
+    cold_start_ms runs from spawn until initialize is answered, which is what
+    a session waits for. handshake_ms is one request round trip on the now
+    running server (ping; an error reply counts), i.e. the protocol's share
+    of that; the rest is launch cost such as npx/uvx resolving packages.
+    """
+    backend = Backend(name, server)
+    result = {"server": name, "ok": False, "cold_start_ms": None,
+              "handshake_ms": None, "tools": None, "error": None}
+    try:
+        start = time.monotonic()
+        backend.ensure_started(timeout)
+        result["cold_start_ms"] = round((time.monotonic() - start) * 1000, 1)
+        start = time.monotonic()
+        try:
+            backend._request("ping", {}, timeout)
+        except BackendError:
+            pass  # answered, just not supported
+        result["handshake_ms"] = round((time.monotonic() - start) * 1000, 1)
+        result["tools"] = len(backend.list_tools(timeout))
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        backend.stop()
+    return result
+
+
+def probe_servers(servers: dict, timeout: float = PROBE_TIMEOUT) -> list[dict]:
+    """Probe every server at once, as a session starting them all would."""
+    with ThreadPoolExecutor(max_workers=max(len(servers), 1)) as pool:
+        return list(pool.map(lambda item: probe_server(*item, timeout), servers.items()))
+
+
+def print_probe(results: list[dict]) -> None:
+    print(f"  {'server':<20} {'cold start':>10} {'handshake':>10} {'tools':>6}")
+    for r in sorted(results, key=lambda r: (not r["ok"], -(r["cold_start_ms"] or 0))):
+        if r["ok"]:
+            print(f"✓ {r['server']:<20} {r['cold_start_ms']:>8.0f}ms {r['handshake_ms']:>8.1f}ms {r['tools']:>6}")
+        else:
+            print(f"✗ {r['server']:<20} {r['error']}")
+    failed = sum(not r["ok"] for r in results)
+    if failed:
+        print(f"\n{failed} of {len(results)} servers failed to start (stderr: {LOG_FILE})")
+
+
+def refresh_manifest(refresh_all: bool = False, verbose: bool = True) -> dict:
+    """Cache tool lists for servers that are new or whose config changed."""
+    servers = load_servers()
+    manifest = load_manifest()
+    cached = manifest.get("servers", {})
+    stale = {
+        name: server for name, server in servers.items()
+        if refresh_all or cached.get(name, {}).get("digest") != server_digest(server)
+    }
+
+    entries = {name: cached[name] for name in servers if name in cached and name not in stale}
+    if stale and verbose:
+        print(f"Probing {len(stale)} servers for their tools...")
+
+    def probe(item):
+        name, server = item
+        try:
+            tools, seconds = probe_tools(name, server)
+            return name, server, tools, seconds, None
+        except Exception as e:
+            return name, server, None, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=max(len(stale), 1)) as pool:
+        for name, server, tools, seconds, error in pool.map(probe, stale.items()):
+            if error:
+                if verbose:
+                    print(f"  ✗ {name}: {error}")
+                if name in cached:
+                    entries[name] = cached[name]  # keep the old list rather than none
+                continue
+            entries[name] = {"digest": server_digest(server), "tools": tools,
+                             "refreshed": time.strftime("%Y-%m-%d %H:%M:%S")}
+            if verbose:
+                print(f"  ✓ {name}: {len(tools)} tools ({seconds:.1f}s)")
+
+    manifest = {"servers": entries}
+    save_manifest(manifest)
+    if verbose:
+        total = sum(len(e["tools"]) for e in entries.values())
+        print(f"Manifest: {len(entries)} servers, {total} tools → {MANIFEST_FILE}")
+    return manifest
+
+
+# --- Stdio MCP server (what agents launch) ---------------------------------
+
+
+class StdioProxy:
+    """MCP server on stdin/stdout that fronts every canonical server."""
+
+    def __init__(self):
+        self.servers = load_servers()
+        self.manifest = load_manifest()
+        self._tools = None
+        self._write_lock = threading.Lock()
+
+    def reply(self, message: dict) -> None:
+        with self._write_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def tools(self) -> list[dict]:
+        """Union of every server's tools, prefixed with the server name."""
+        if self._tools is not None:
+            return self._tools
+        tools = []
+        cached = self.manifest.get("servers", {})
+        missing = [n for n, s in self.servers.items()
+                   if cached.get(n, {}).get("digest") != server_digest(s)]
+        if missing:
+            # Not in the manifest yet: fetch through the daemon, which keeps the
+            # server warm for the call that usually follows
+            try:
+                ensure_daemon()
+                for name in missing:
+                    try:
+                        cached[name] = {"digest": server_digest(self.servers[name]),
+                                        "tools": daemon_request({"op": "tools", "server": name}),
+                                        "refreshed": time.strftime("%Y-%m-%d %H:%M:%S")}
+                    except (BackendError, OSError) as e:
+                        log(f"could not list tools for {name}: {e}")
+                save_manifest(self.manifest)
+            except (RuntimeError, OSError) as e:
+                log(f"manifest refresh failed: {e}")
+
+        for name in self.servers:
+            for tool in cached.get(name, {}).get("tools", []):
+                tool = dict(tool)
+                tool["name"] = f"{name}{SEPARATOR}{tool['name']}"
+                tool["description"] = f"[{name}] {tool.get('description', '')}".strip()
+                tools.append(tool)
+        self._tools = tools
+        return tools
+
+    def route(self, tool_name: str) -> tuple[str, str]:
+        """(server, tool) for a prefixed tool name; longest server name wins."""
+        for name in sorted(self.servers, key=len, reverse=True):
+            if tool_name.startswith(name + SEPARATOR):
+                return name, tool_name[len(name) + len(SEPARATOR):]
+        raise ValueError(f"Unknown tool: {tool_name}")
+
+    def call_tool(self, request_id, params: dict) -> None:
+        try:
+            server, tool = self.route(params.get("name", ""))
+            ensure_daemon()
+            result = daemon_request({"op": "call", "server": server, "method": "tools/call",
+                                     "params": {**params, "name": tool}})
+            self.reply({"jsonrpc": "2.0", "id": request_id, "result": result})
+        except BackendError as e:
+            self.reply({"jsonrpc": "2.0", "id": request_id, "error": e.error})
+        except Exception as e:
+            self.reply({"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": -32603, "message": str(e)}})
+
+    def serve(self) -> None:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                self.reply({"jsonrpc": "2.0", "id": None,
+                            "error": {"code": -32700, "message": "Parse error"}})
+                continue
+            request_id = message.get("id")
+            method = message.get("method")
+            if request_id is None:
+                continue  # notifications (initialized, cancelled)
+
+            params = message.get("params") or {}
+            if method == "initialize":
+                result = {
+                    "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": "mcp-proxy", "version": "1.0"},
+                }
+            elif method == "ping":
+                result = {}
+            elif method == "tools/list":
+                result = {"tools": self.tools()}
+            elif method == "tools/call":
+                # Calls can be slow; don't hold up other requests behind them
+                threading.Thread(target=self.call_tool, args=(request_id, params),
+                                 daemon=True).start()
+                continue
+            else:
+                self.reply({"jsonrpc": "2.0", "id": request_id,
+                            "error": {"code": -32601, "message": f"Method not found: {method}"}})
+                continue
+            self.reply({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+
+def print_status() -> None:
+    if not daemon_running():
+        print("Daemon not running")
+        return
+    status = daemon_request({"op": "status"})
+    if not status:
+        print("Daemon running, no backends started")
+    for name, s in sorted(status.items()):
+        state = f"warm, up {s['uptime_seconds']}s" if s["running"] else "stopped"
+        print(f"  {name:<20} {state:<18} idle {s['idle_seconds']}s"
+              + (f", {s['active']} in flight" if s["active"] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lazy-start multiplexing MCP proxy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--refresh-manifest", action="store_true",
+                        help="Launch new/changed servers once and cache their tool lists")
+    parser.add_argument("--all", action="store_true",
+                        help="With --refresh-manifest, re-probe every server")
+    parser.add_argument("--probe", action="store_true",
+                        help="Start every server at once and report startup latency and tool count")
+    parser.add_argument("--json", action="store_true", help="With --probe, print results as JSON")
+    parser.add_argument("--timeout", type=float, default=PROBE_TIMEOUT,
+                        help=f"With --probe, seconds to wait per server (default: {PROBE_TIMEOUT})")
+    parser.add_argument("--status", action="store_true", help="Show backends in the daemon")
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon and its backends")
+    parser.add_argument("--daemon", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.daemon:
+        run_daemon()
+    elif args.refresh_manifest:
+        refresh_manifest(refresh_all=args.all)
+    elif args.probe:
+        results = probe_servers(load_servers(), args.timeout)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_probe(results)
+        sys.exit(1 if any(not r["ok"] for r in results) else 0)
+    elif args.status:
+        print_status()
+    elif args.stop:
+        print("Stopping daemon" if daemon_running() and daemon_request({"op": "stop"})
+              else "Daemon not running")
+    else:
+        StdioProxy().serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,71 +8,256 @@ Sync MCP servers from canonical config to Claude Code, Codex, and OpenCode.
 
 Canonical source: ~/agent-config/mcp-servers.json
 Targets:
-  - Claude Code (prints commands to run)
+  - Claude Code (prints commands to run, or writes ~/.claude.json)
   - ~/.codex/config.toml
   - ~/.opencode/mcp.json
 
 Usage:
-  uv run ~/scripts/mcp-sync.py [--apply]
+  uv run ~/scripts/mcp-sync.py [--apply] [--force] [--proxy] [--write-claude]
+  uv run ~/scripts/mcp-sync.py --watch [--proxy]
+  uv run ~/scripts/mcp-sync.py --probe [--json] [--timeout SECONDS]
 
 Without --apply: shows what would change (dry run)
 With --apply: updates Codex/OpenCode, prints Claude commands
+With --force: ignore the recorded sync state and re-sync every target
+With --proxy: configure a single lazy-start proxy entry (mcp-proxy.py) in
+  every target instead of each server, and refresh its tool manifest
+With --write-claude: update the user-scope servers in ~/.claude.json in one
+  write instead of printing claude mcp commands
+With --watch: stay running and re-sync (apply + write-claude) whenever the
+  canonical config changes; edits are debounced and validated first
+With --probe: start every server at once, complete the MCP initialize
+  handshake (with a timeout), and report cold-start latency, handshake
+  latency and tool count per server; exits 1 if any server fails
+
+Sync is incremental: a digest of each target's rendered servers is stored in
+~/.cache/mcp-sync/state.json, so targets whose servers (and file) haven't
+changed since the last --apply are skipped without being read or written.
+Changed files are replaced atomically.
 """
 
+import argparse
+import ctypes
+import ctypes.util
+import difflib
+import hashlib
 import json
 import os
+import re
+import select
+import struct
+import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 # Paths
 CANONICAL_CONFIG = Path.home() / "agent-config" / "mcp-servers.json"
 CODEX_CONFIG = Path.home() / ".codex" / "config.toml"
+CLAUDE_CONFIG = Path.home() / ".claude.json"
 OPENCODE_MCP = Path.home() / ".opencode" / "mcp.json"
+STATE_FILE = Path.home() / ".cache" / "mcp-sync" / "state.json"
+PROXY_SCRIPT = Path(__file__).resolve().parent / "mcp-proxy.py"
+PROXY_NAME = "mcp-proxy"
+
+# --watch: wait for this long without further edits before syncing
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 1.0
+
+# Server names become TOML bare keys in the Codex config
+SERVER_NAME = re.compile(r"[A-Za-z0-9_-]+")
 
 # Command path mappings for Codex (needs full paths)
 PATH_MAP = {
     "npx": "/opt/homebrew/bin/npx",
     "uvx": "/Users/terry/.pyenv/shims/uvx",
+    "uv": "/opt/homebrew/bin/uv",
 }
 
 
-def load_canonical() -> tuple[dict, dict]:
-    """Load canonical MCP config. Returns (servers, codex_extras)."""
-    with open(CANONICAL_CONFIG) as f:
-        data = json.load(f)
+def load_canonical() -> tuple[dict, dict] | None:
+    """Load and validate the canonical config. Returns (servers, codex_extras),
+    or prints the problems and returns None."""
+    try:
+        with open(CANONICAL_CONFIG) as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"✗ Cannot read {CANONICAL_CONFIG}: {e}")
+        return None
+    problems = validate_canonical(data)
+    if problems:
+        print(f"✗ {CANONICAL_CONFIG} is invalid, nothing synced:")
+        for problem in problems:
+            print(f"  {problem}")
+        return None
     return data.get("mcpServers", {}), data.get("_codexExtras", {})
 
 
+def validate_canonical(data) -> list[str]:
+    """Problems that would make a sync write a broken config ([] if valid)."""
+    if not isinstance(data, dict):
+        return ["top level must be an object"]
+    problems = []
+    servers = data.get("mcpServers", {})
+    extras = data.get("_codexExtras", {})
+    if not isinstance(servers, dict):
+        return ["mcpServers must be an object"]
+    if not isinstance(extras, dict):
+        return ["_codexExtras must be an object"]
+
+    for name, server in {**extras, **servers}.items():
+        if not SERVER_NAME.fullmatch(name):
+            problems.append(f"{name!r}: name may only contain letters, digits, '-' and '_'")
+        if not isinstance(server, dict):
+            problems.append(f"{name}: must be an object")
+            continue
+        if name in extras and name not in servers and "url" in server:
+            continue
+        if not isinstance(server.get("command"), str) or not server["command"]:
+            problems.append(f"{name}: missing command")
+        args = server.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+            problems.append(f"{name}: args must be a list of strings")
+        env = server.get("env", {})
+        if not isinstance(env, dict) or not all(isinstance(v, str) for v in env.values()):
+            problems.append(f"{name}: env must map names to strings")
+    return problems
+
+
+def proxy_servers() -> dict:
+    """The single entry that replaces every server in --proxy mode."""
+    return {PROXY_NAME: {"command": "uv", "args": ["run", str(PROXY_SCRIPT)]}}
+
+
+def refresh_proxy_manifest() -> None:
+    """Have mcp-proxy cache the tool lists of new or changed servers."""
+    print("\n--- Proxy Manifest ---")
+    result = subprocess.run([sys.executable, str(PROXY_SCRIPT), "--refresh-manifest"])
+    if result.returncode:
+        print(f"✗ Manifest refresh failed (exit {result.returncode}); "
+              "the proxy will list missing servers on first use")
+
+
+def probe(json_output: bool = False, timeout: float | None = None) -> int:
+    """Run mcp-proxy's --probe over the canonical servers; returns its exit code."""
+    command = [sys.executable, str(PROXY_SCRIPT), "--probe"]
+    if json_output:
+        command.append("--json")
+    if timeout is not None:
+        command += ["--timeout", str(timeout)]
+    return subprocess.run(command).returncode
+
+
+def digest(obj) -> str:
+    """Stable SHA-256 of a JSON-serialisable value."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+
+def file_stamp(path: Path) -> list | None:
+    """(mtime_ns, size) of path, or None if it doesn't exist."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_state() -> dict:
+    """Per-target digests from the last --apply ({} if none)."""
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def atomic_write(path: Path, content: str) -> None:
+    """Write content to path via a temp file in the same directory and rename.
+
+    Readers see either the old file or the new one, never a partial write.
+    The original file's permissions are kept.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def save_state(state: dict) -> None:
+    atomic_write(STATE_FILE, json.dumps(state, indent=2, sort_keys=True) + "\n")
+
+
+def diff_servers(old: dict, new: dict) -> dict:
+    """Compare {name: digest} maps. Returns {'added', 'changed', 'removed'} name lists."""
+    return {
+        "added": sorted(n for n in new if n not in old),
+        "changed": sorted(n for n in new if n in old and old[n] != new[n]),
+        "removed": sorted(n for n in old if n not in new),
+    }
+
+
+def format_diff(diff: dict) -> str:
+    """One-line summary like '+a ~b -c'."""
+    parts = [f"+{n}" for n in diff["added"]]
+    parts += [f"~{n}" for n in diff["changed"]]
+    parts += [f"-{n}" for n in diff["removed"]]
+    return " ".join(parts)
+
+
+def claude_command(name: str, server: dict) -> str:
+    """claude mcp add command for one server."""
+    parts = ["claude", "mcp", "add", "-s", "user"]
+
+    # Add env vars
+    if "env" in server:
+        for k, v in server["env"].items():
+            # Use env var reference
+            parts.extend(["-e", f"{k}={v}"])
+
+    parts.append(name)
+    parts.append("--")
+    parts.append(server.get("command", ""))
+    parts.extend(server.get("args", []))
+    return " ".join(parts)
+
+
 def generate_claude_commands(servers: dict) -> list[str]:
     """Generate claude mcp add commands."""
-    commands = []
+    return [claude_command(name, server) for name, server in servers.items()]
 
-    for name, server in servers.items():
-        parts = ["claude", "mcp", "add", "-s", "user"]
 
-        # Add env vars
+def claude_entries(servers: dict) -> dict[str, dict]:
+    """~/.claude.json user-scope entries (env references expanded, as the shell
+    would when running the printed claude mcp add commands)."""
+    entries = {}
+    for name, server in servers.items():
+        entry = {"type": "stdio", "command": server.get("command", ""),
+                 "args": server.get("args", [])}
         if "env" in server:
-            for k, v in server["env"].items():
-                # Use env var reference
-                parts.extend(["-e", f"{k}={v}"])
-
-        parts.append(name)
-        parts.append("--")
-        parts.append(server.get("command", ""))
-        parts.extend(server.get("args", []))
-
-        commands.append(" ".join(parts))
+            entry["env"] = {k: os.path.expandvars(v) for k, v in server["env"].items()}
+        entries[name] = entry
+    return entries
 
-    return commands
 
+def codex_entries(servers: dict, extras: dict) -> dict[str, list[str]]:
+    """TOML lines per server, extras (context7, serena) first."""
+    entries = {}
 
-def generate_codex_mcp_lines(servers: dict, extras: dict) -> list[str]:
-    """Generate TOML lines for MCP servers."""
-    lines = []
-
-    # Add extras first (context7, serena)
     for name, server in extras.items():
-        lines.append(f"[mcp_servers.{name}]")
+        lines = [f"[mcp_servers.{name}]"]
         if "url" in server:
             lines.append(f'url = "{server["url"]}"')
         else:
@@ -80,11 +265,10 @@ def generate_codex_mcp_lines(servers: dict, extras: dict) -> list[str]:
             lines.append(f'command = "{PATH_MAP.get(cmd, cmd)}"')
             args_str = ", ".join(f'"{a}"' for a in server.get("args", []))
             lines.append(f"args = [{args_str}]")
-        lines.append("")
+        entries[name] = lines
 
-    # Add main servers
     for name, server in servers.items():
-        lines.append(f"[mcp_servers.{name}]")
+        lines = [f"[mcp_servers.{name}]"]
         cmd = server.get("command", "")
         lines.append(f'command = "{PATH_MAP.get(cmd, cmd)}"')
         args_str = ", ".join(f'"{a}"' for a in server.get("args", []))
@@ -92,16 +276,22 @@ def generate_codex_mcp_lines(servers: dict, extras: dict) -> list[str]:
         if "env" in server:
             env_parts = ", ".join(f'{k} = "{v}"' for k, v in server["env"].items())
             lines.append(f"env = {{ {env_parts} }}")
-        lines.append("")
+        entries[name] = lines
 
-    return lines
+    return entries
 
 
-def sync_codex(servers: dict, extras: dict, dry_run: bool = True) -> None:
-    """Sync MCP servers to Codex config."""
-    with open(CODEX_CONFIG) as f:
-        content = f.read()
+def generate_codex_mcp_lines(entries: dict[str, list[str]]) -> list[str]:
+    """Generate TOML lines for MCP servers."""
+    lines = []
+    for entry in entries.values():
+        lines.extend(entry)
+        lines.append("")
+    return lines
+
 
+def render_codex(content: str, entries: dict[str, list[str]]) -> str:
+    """Codex config.toml with its [mcp_servers.*] tables replaced by entries."""
     lines = content.split("\n")
     new_lines = []
     in_mcp_section = False
@@ -110,7 +300,7 @@ def sync_codex(servers: dict, extras: dict, dry_run: bool = True) -> None:
     for line in lines:
         if line.strip().startswith("[mcp_servers."):
             if not mcp_inserted:
-                new_lines.extend(generate_codex_mcp_lines(servers, extras))
+                new_lines.extend(generate_codex_mcp_lines(entries))
                 mcp_inserted = True
             in_mcp_section = True
             continue
@@ -126,28 +316,20 @@ def sync_codex(servers: dict, extras: dict, dry_run: bool = True) -> None:
         inserted = False
         for line in new_lines:
             if not inserted and (line.strip().startswith("[projects") or line.strip().startswith("[features")):
-                final_lines.extend(generate_codex_mcp_lines(servers, extras))
+                final_lines.extend(generate_codex_mcp_lines(entries))
                 final_lines.append("")
                 inserted = True
             final_lines.append(line)
         if not inserted:
-            final_lines.extend(generate_codex_mcp_lines(servers, extras))
+            final_lines.extend(generate_codex_mcp_lines(entries))
         new_lines = final_lines
 
-    result = "\n".join(new_lines)
-
-    if dry_run:
-        print("=== Codex config (would write) ===")
-        print(result)
-    else:
-        with open(CODEX_CONFIG, "w") as f:
-            f.write(result)
-        print(f"✓ Updated {CODEX_CONFIG}")
+    return "\n".join(new_lines)
 
 
-def sync_opencode(servers: dict, dry_run: bool = True) -> None:
-    """Sync MCP servers to OpenCode config (strip env var values)."""
-    opencode_servers = {}
+def opencode_entries(servers: dict) -> dict[str, dict]:
+    """OpenCode server entries (env values taken from the environment)."""
+    entries = {}
 
     for name, server in servers.items():
         s = {"command": server.get("command", "")}
@@ -156,47 +338,324 @@ def sync_opencode(servers: dict, dry_run: bool = True) -> None:
         # Keep env keys but OpenCode reads from actual env at runtime
         if "env" in server:
             s["env"] = {k: os.environ.get(k, "") for k in server["env"].keys()}
-        opencode_servers[name] = s
+        entries[name] = s
+
+    return entries
+
+
+def render_opencode(content: str, entries: dict[str, dict]) -> str:
+    """OpenCode mcp.json for entries (the file is fully generated)."""
+    return json.dumps({"mcpServers": entries}, indent=2) + "\n"
+
+
+def sync_file(key: str, path: Path, entries: dict, render, state: dict,
+              dry_run: bool = True, force: bool = False) -> dict | None:
+    """Bring one config file in line with entries, touching it only if needed.
+
+    Skipped without reading the file when the entries digest and the file's
+    (mtime, size) both match the last --apply. Otherwise the file is
+    re-rendered and, if its content differs, replaced atomically. Returns the
+    per-server diff, or None if the target was already up to date.
+    """
+    server_digests = {name: digest(entry) for name, entry in entries.items()}
+    target_digest = digest(server_digests)
+    prev = state.get(key, {})
+    stamp = file_stamp(path)
+
+    if not force and stamp and prev.get("digest") == target_digest and prev.get("file") == stamp:
+        print(f"= {path} up to date")
+        return None
+
+    current = path.read_text() if stamp else ""
+    result = render(current, entries)
+    diff = diff_servers(prev.get("servers", {}), server_digests)
+
+    if result == current:
+        print(f"= {path} up to date")
+        diff = None
+    elif dry_run:
+        print(f"Would update {path}: {format_diff(diff) or 'file drifted from canonical'}")
+        print("".join(difflib.unified_diff(
+            current.splitlines(keepends=True), result.splitlines(keepends=True),
+            fromfile=str(path), tofile=f"{path} (synced)", n=1,
+        )))
+    else:
+        atomic_write(path, result)
+        print(f"✓ Updated {path}: {format_diff(diff) or 'restored from canonical'}")
 
-    result = {"mcpServers": opencode_servers}
-    output = json.dumps(result, indent=2)
+    if not dry_run:
+        state[key] = {"digest": target_digest, "servers": server_digests,
+                      "file": file_stamp(path)}
+    return diff
 
-    if dry_run:
-        print("\n=== OpenCode config (would write) ===")
-        print(output)
-    else:
-        with open(OPENCODE_MCP, "w") as f:
-            f.write(output + "\n")
-        print(f"✓ Updated {OPENCODE_MCP}")
 
+def sync_codex(servers: dict, extras: dict, state: dict, dry_run: bool = True,
+               force: bool = False) -> dict | None:
+    """Sync MCP servers to Codex config."""
+    return sync_file("codex", CODEX_CONFIG, codex_entries(servers, extras), render_codex,
+                     state, dry_run, force)
 
-def main():
-    apply = "--apply" in sys.argv
 
-    print(f"Canonical source: {CANONICAL_CONFIG}")
-    print(f"Mode: {'APPLY' if apply else 'DRY RUN'}\n")
+def sync_opencode(servers: dict, state: dict, dry_run: bool = True,
+                  force: bool = False) -> dict | None:
+    """Sync MCP servers to OpenCode config (strip env var values)."""
+    return sync_file("opencode", OPENCODE_MCP, opencode_entries(servers), render_opencode,
+                     state, dry_run, force)
 
-    servers, extras = load_canonical()
-    print(f"Found {len(servers)} servers + {len(extras)} Codex extras\n")
 
-    # Claude Code commands
-    print("--- Claude Code Commands ---")
-    print("Run these to sync Claude Code (or skip if already configured):\n")
-    for cmd in generate_claude_commands(servers):
-        print(cmd)
-    print()
+def sync_claude(servers: dict, state: dict, force: bool = False) -> dict | None:
+    """Print claude mcp commands for servers that differ from ~/.claude.json.
+
+    Printing applies nothing, so no state is saved here: only write_claude
+    records what Claude Code actually has. Until it has run, every command is
+    printed on every run.
+    """
+    commands = {name: claude_command(name, server) for name, server in servers.items()}
+    server_digests = {name: digest(entry) for name, entry in claude_entries(servers).items()}
+    prev = {} if force else state.get("claude", {}).get("servers", {})
+    diff = diff_servers(prev, server_digests)
+
+    if not any(diff.values()):
+        print("= Claude Code up to date")
+        return None
+
+    if not prev:
+        print("Run these to sync Claude Code (or skip if already configured):\n")
+    else:
+        print(f"Run these to sync Claude Code ({format_diff(diff)}):\n")
+    for name in diff["removed"] + diff["changed"]:
+        print(f"claude mcp remove -s user {name}")
+    for name in diff["added"] + diff["changed"]:
+        print(commands[name])
+    return diff
+
+
+def write_claude(servers: dict, state: dict, dry_run: bool = True,
+                 force: bool = False) -> dict | None:
+    """Update Claude Code's user-scope servers in ~/.claude.json in one write.
+
+    Only servers this script manages are touched: added and changed ones are
+    set, ones removed from the canonical config are deleted, anything added
+    with claude mcp add by hand is left alone. The file is re-read right
+    before the write, since Claude Code rewrites it while running.
+    """
+    entries = claude_entries(servers)
+    server_digests = {name: digest(entry) for name, entry in entries.items()}
+    prev = state.get("claude", {}).get("servers", {})
+    diff = diff_servers({} if force else prev, server_digests)
+    if force:
+        diff["removed"] = sorted(n for n in prev if n not in server_digests)
+
+    if not any(diff.values()):
+        print(f"= {CLAUDE_CONFIG} up to date")
+        return None
+
+    if dry_run:
+        print(f"Would update {CLAUDE_CONFIG}: {format_diff(diff)}")
+        return diff
+
+    data = json.loads(CLAUDE_CONFIG.read_text()) if CLAUDE_CONFIG.exists() else {}
+    configured = data.setdefault("mcpServers", {})
+    for name in diff["removed"]:
+        configured.pop(name, None)
+    for name in diff["added"] + diff["changed"]:
+        configured[name] = entries[name]
+    atomic_write(CLAUDE_CONFIG, json.dumps(data, indent=2) + "\n")
+    print(f"✓ Updated {CLAUDE_CONFIG}: {format_diff(diff)}")
+
+    state["claude"] = {"servers": server_digests}
+    return diff
+
+
+def sync_all(servers: dict, extras: dict, state: dict, apply: bool = False,
+             force: bool = False, proxy: bool = False,
+             direct_claude: bool = False) -> dict:
+    """Sync every target; returns {target: diff or None}."""
+    if proxy:
+        # Targets see only the proxy; it fronts the canonical servers itself
+        servers = proxy_servers()
+    changes = {}
+
+    # Claude Code
+    if direct_claude:
+        print("--- Claude Code Config ---")
+        changes["Claude Code"] = write_claude(servers, state, dry_run=not apply, force=force)
+    else:
+        print("--- Claude Code Commands ---")
+        changes["Claude Code"] = sync_claude(servers, state, force=force)
 
     # Codex
-    print("--- Codex Sync ---")
-    sync_codex(servers, extras, dry_run=not apply)
+    print("\n--- Codex Sync ---")
+    changes["Codex"] = sync_codex(servers, extras, state, dry_run=not apply, force=force)
 
     # OpenCode
     print("\n--- OpenCode Sync ---")
-    sync_opencode(servers, dry_run=not apply)
+    changes["OpenCode"] = sync_opencode(servers, state, dry_run=not apply, force=force)
+
+    if apply:
+        save_state(state)
+        if proxy:
+            refresh_proxy_manifest()
+    return changes
+
+
+def print_summary(changes: dict) -> dict:
+    """Per-target summary; returns the targets that changed."""
+    changed = {target: diff for target, diff in changes.items() if diff is not None}
+    print("\n---")
+    if not changed:
+        print("Everything up to date")
+    for target, diff in changed.items():
+        summary = format_diff(diff) or "no server changes (file re-synced)"
+        print(f"{target}: {summary}")
+    return changed
+
+
+def inotify_open(directory: Path) -> int:
+    """inotify fd watching directory for files written, created, moved in or
+    deleted. Raises OSError where inotify isn't available."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    # IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    if libc.inotify_add_watch(fd, str(directory).encode(), 0x008 | 0x080 | 0x100 | 0x200) < 0:
+        os.close(fd)
+        raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+    return fd
+
+
+def inotify_changes(path: Path, fd: int):
+    """Yield once per burst of edits to path.
+
+    The parent directory is watched, since editors usually save by writing a
+    new file and renaming it over the old one.
+    """
+    target = path.name.encode()
+    try:
+        while True:
+            select.select([fd], [], [])
+            buf = os.read(fd, 65536)
+            names = set()
+            offset = 0
+            while offset < len(buf):
+                _, _, _, length = struct.unpack_from("iIII", buf, offset)
+                names.add(buf[offset + 16:offset + 16 + length].rstrip(b"\0"))
+                offset += 16 + length
+            if target not in names:
+                continue
+            # Debounce: wait until the directory has been quiet for a moment
+            while select.select([fd], [], [], WATCH_DEBOUNCE)[0]:
+                os.read(fd, 65536)
+            yield
+    finally:
+        os.close(fd)
+
+
+def poll_changes(path: Path):
+    """Yield once per burst of edits to path by polling its (mtime, size)."""
+    last = file_stamp(path)
+    while True:
+        time.sleep(WATCH_POLL_INTERVAL)
+        stamp = file_stamp(path)
+        if stamp == last:
+            continue
+        # Debounce: wait until the file stops changing
+        while True:
+            time.sleep(WATCH_DEBOUNCE)
+            settled = file_stamp(path)
+            if settled == stamp:
+                break
+            stamp = settled
+        last = stamp
+        yield
+
+
+def watch(force: bool = False, proxy: bool = False) -> None:
+    """Re-sync whenever the canonical config changes, until interrupted."""
+    state = load_state()
+
+    def sync_now():
+        print(f"[{time.strftime('%H:%M:%S')}] Syncing {CANONICAL_CONFIG}\n")
+        canonical = load_canonical()
+        if canonical:
+            print_summary(sync_all(*canonical, state, apply=True, force=force,
+                                   proxy=proxy, direct_claude=True))
+
+    changes = None
+    if sys.platform.startswith("linux"):
+        try:
+            changes = inotify_changes(CANONICAL_CONFIG, inotify_open(CANONICAL_CONFIG.parent))
+            how = "inotify"
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling instead")
+    if changes is None:
+        changes = poll_changes(CANONICAL_CONFIG)
+        how = f"polling every {WATCH_POLL_INTERVAL:g}s"
+
+    try:
+        sync_now()
+        while True:
+            print(f"\nWatching {CANONICAL_CONFIG} ({how}, Ctrl-C to stop)\n")
+            next(changes)
+            sync_now()
+            force = False  # --force applies to the first sync only
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sync MCP servers to Claude Code, Codex, and OpenCode",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--apply", action="store_true",
+                        help="Update Codex/OpenCode configs (default: dry run)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore recorded sync state and re-sync every target")
+    parser.add_argument("--proxy", action="store_true",
+                        help="Configure one lazy-start proxy entry instead of each server")
+    parser.add_argument("--write-claude", action="store_true",
+                        help=f"Write Claude Code servers to {CLAUDE_CONFIG} instead of printing commands")
+    parser.add_argument("--watch", action="store_true",
+                        help="Re-sync (apply + write-claude) whenever the canonical config changes")
+    parser.add_argument("--probe", action="store_true",
+                        help="Start every server concurrently and report startup latency and tool count")
+    parser.add_argument("--json", action="store_true", help="With --probe, print results as JSON")
+    parser.add_argument("--timeout", type=float,
+                        help="With --probe, seconds to wait per server (default: 30)")
+    args = parser.parse_args()
+    apply = args.apply or args.watch
+
+    if args.probe:
+        if load_canonical() is None:
+            sys.exit(1)
+        if not args.json:
+            print(f"Probing servers in {CANONICAL_CONFIG}\n")
+        sys.exit(probe(args.json, args.timeout))
+
+    print(f"Canonical source: {CANONICAL_CONFIG}")
+    print(f"Mode: {'WATCH' if args.watch else 'APPLY' if apply else 'DRY RUN'}"
+          f"{' (proxy)' if args.proxy else ''}\n")
+
+    if args.watch:
+        watch(force=args.force, proxy=args.proxy)
+        return
+
+    canonical = load_canonical()
+    if canonical is None:
+        sys.exit(1)
+    servers, extras = canonical
+    print(f"Found {len(servers)} servers + {len(extras)} Codex extras\n")
+
+    state = load_state()
+    changes = sync_all(servers, extras, state, apply=apply, force=args.force,
+                       proxy=args.proxy, direct_claude=args.write_claude)
+    changed = print_summary(changes)
 
-    if not apply:
-        print("\n---")
-        print("Run with --apply to update Codex/OpenCode configs")
+    if not apply and changed:
+        print("\nRun with --apply to update Codex/OpenCode configs")
 
 
 if __name__ == "__main__":
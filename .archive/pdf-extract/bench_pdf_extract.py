@@ -0,0 +1,458 @@
+# /// script
+# dependencies = ["llama-parse", "pymupdf4llm", "pymupdf", "pytesseract", "pillow"]
+# ///
+
+"""
+PDF Extract Benchmark - Throughput and memory of each pdf_extract backend.
+
+Generates fixture PDFs locally (no network), runs each backend on each
+fixture in a fresh process, and reports pages/sec, peak RSS and characters
+extracted. Results can be saved as a baseline and later runs compared
+against it, so a slower or hungrier change shows up as a regression.
+
+Usage:
+    uv run bench_pdf_extract.py [options]
+
+Options:
+    --quick           Small fixtures only (fast smoke run)
+    --backends B,..   Backends to run: pymupdf4llm,hybrid,ocr,llamaparse,hedge
+    --workers N       OCR worker processes (0 = one per CPU core)
+    --stub-llamaparse Serve a local LlamaParse stand-in for llamaparse/hedge
+    --stub-delay S    Seconds the stub takes per job (default: 0)
+    --prefer-cloud S  hedge backend's --prefer-cloud (default: 15)
+    --fixtures DIR    Where fixture PDFs are generated (default: /tmp/pdf-extract-bench)
+    --baseline FILE   Baseline JSON (default: ~/.cache/pdf-extract/bench-baseline.json)
+    --save-baseline   Store this run as the new baseline
+    --json            Print results as JSON
+
+Backends:
+    ocr needs the tesseract binary and is skipped without it. llamaparse and
+    hedge (LlamaParse raced against pymupdf4llm) only run when
+    LLAMA_CLOUD_BASE_URL points at a local endpoint, e.g. --stub-llamaparse,
+    which also checks that a fast cloud result wins the hedge and a slow one
+    loses it.
+
+Examples:
+    uv run bench_pdf_extract.py --quick
+    uv run bench_pdf_extract.py --quick --stub-llamaparse --backends llamaparse,hedge
+    uv run bench_pdf_extract.py --save-baseline
+    uv run bench_pdf_extract.py --backends hybrid,ocr --workers 0
+"""
+
+import argparse
+import http.server
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# Regression thresholds relative to the baseline
+MAX_SLOWDOWN = 0.15        # pages/sec may drop by at most 15%
+MAX_RSS_GROWTH = 0.25      # peak RSS may grow by at most 25%
+MAX_CHARS_DRIFT = 0.01     # extracted characters may change by at most 1%
+
+DEFAULT_FIXTURE_DIR = "/tmp/pdf-extract-bench"
+DEFAULT_BASELINE = os.path.expanduser("~/.cache/pdf-extract/bench-baseline.json")
+
+ALL_BACKENDS = ["pymupdf4llm", "hybrid", "ocr", "llamaparse", "hedge"]
+CLOUD_BACKENDS = {"llamaparse", "hedge"}
+DEFAULT_PREFER_CLOUD = 15
+
+# name -> (pages, which pages are image-only scans)
+FIXTURES = {
+    "text-20": (20, lambda n: False),
+    "scan-10": (10, lambda n: True),
+    "mixed-40": (40, lambda n: n % 8 == 7),
+    "text-500": (500, lambda n: False),
+    "mixed-200": (200, lambda n: n % 10 == 9),
+}
+QUICK_FIXTURES = ["text-20", "scan-10", "mixed-40"]
+
+# Image-only fixture pages are rendered at a typical scanner resolution
+SCAN_DPI = 200
+
+LOREM = (
+    "Total compensation for senior engineers rose 4.2% year on year, with the "
+    "largest gains in platform, data and security roles. Bonus targets held "
+    "flat while equity refresh grants shrank in most regions. "
+)
+
+
+def make_fixture(path, pages, is_scan):
+    """Write a deterministic PDF with text pages and image-only scan pages."""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page(width=595, height=842)  # A4
+        body = f"Page {n + 1}\n\n" + LOREM * 12
+        if is_scan(n):
+            # Render the text on a scratch page, then place only the bitmap
+            scratch = fitz.open()
+            src = scratch.new_page(width=595, height=842)
+            src.insert_textbox(fitz.Rect(56, 56, 539, 786), body, fontsize=11)
+            pix = src.get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY)
+            page.insert_image(page.rect, pixmap=pix)
+            scratch.close()
+        else:
+            page.insert_textbox(fitz.Rect(56, 56, 539, 786), body, fontsize=11)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def ensure_fixtures(fixture_dir, names):
+    """Generate any missing fixture PDFs; returns {name: path}."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    paths = {}
+    for name in names:
+        path = os.path.join(fixture_dir, f"{name}.pdf")
+        if not os.path.exists(path):
+            pages, is_scan = FIXTURES[name]
+            print(f"Generating fixture {name} ({pages} pages)...", file=sys.stderr)
+            make_fixture(path, pages, is_scan)
+        paths[name] = path
+    return paths
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    """The three LlamaParse routes the client uses: upload, status, result."""
+
+    def do_POST(self):
+        if not self.path.split("?")[0].endswith("/parsing/upload"):
+            return self._reply(404, {"detail": "not found"})
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        fields = _parse_multipart(self.headers["Content-Type"], body)
+        job_id = str(uuid.uuid4())
+        self.server.jobs[job_id] = {
+            "markdown": _stub_markdown(fields.get("file", b""), fields.get("target_pages")),
+            "ready_at": time.monotonic() + self.server.delay,
+        }
+        self._reply(200, {"id": job_id, "status": "PENDING"})
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        # api/parsing/job/<id>[/result/<type>]
+        job = self.server.jobs.get(parts[3]) if parts[:3] == ["api", "parsing", "job"] and len(parts) > 3 else None
+        if job is None:
+            return self._reply(404, {"detail": "job not found"})
+        ready = time.monotonic() >= job["ready_at"]
+        if len(parts) == 4:
+            return self._reply(200, {"id": parts[3], "status": "SUCCESS" if ready else "PENDING"})
+        if parts[4:] == ["result", "markdown"] and ready:
+            return self._reply(200, {"markdown": job["markdown"], "job_metadata": {}})
+        self._reply(404, {"detail": "result not available"})
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _parse_multipart(content_type, body):
+    """Decode a multipart/form-data body into {field: bytes or str}."""
+    from email.parser import BytesParser
+    from email.policy import default
+
+    msg = BytesParser(policy=default).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True)
+        fields[name] = payload if part.get_filename() else payload.decode()
+    return fields
+
+
+def _stub_markdown(pdf_bytes, target_pages=None):
+    """Stand-in for LlamaParse's output: the PDF's text layer, page by page."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = range(len(doc))
+        if target_pages:
+            pages = [int(n) for n in target_pages.split(",")]
+        return "\n\n---\n\n".join(doc[n].get_text() for n in pages)
+
+
+class LlamaParseStub(http.server.ThreadingHTTPServer):
+    """Local LlamaParse stand-in on a free port; set delay to mimic the cloud.
+
+    Jobs report PENDING until delay seconds after upload, then return the
+    PDF's text layer as markdown. Point LLAMA_CLOUD_BASE_URL at url.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.delay = delay
+        self.jobs = {}
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+def peak_rss_mb():
+    """Peak RSS of this process plus its (waited-for) children, in MB."""
+    import resource
+
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(pdf_path, backend, workers, prefer_cloud=DEFAULT_PREFER_CLOUD):
+    """Run one backend on one PDF in this process; print a JSON result."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import contextlib
+    import fitz  # PyMuPDF
+    import pdf_extract
+
+    with fitz.open(pdf_path) as doc:
+        page_nums = list(range(len(doc)))
+
+    out_dir = tempfile.mkdtemp(prefix="pdf-extract-bench-")
+    output_path = os.path.join(out_dir, "out.md")
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            if backend in ("hybrid", "ocr"):
+                if backend == "hybrid":
+                    pages = pdf_extract.iter_hybrid_pages(pdf_path, page_nums, workers=workers)
+                else:
+                    pages = pdf_extract.iter_ocr_pages(pdf_path, page_nums, workers=workers)
+                result = pdf_extract.write_pages(pages, output_path, min_chars=None)
+                chars = result['chars'] if result else None
+            else:
+                if backend == "pymupdf4llm":
+                    text = pdf_extract.extract_with_pymupdf4llm(pdf_path)
+                elif backend == "llamaparse":
+                    text = pdf_extract.extract_with_llamaparse(pdf_path)
+                else:
+                    winner, text = pdf_extract.race_backends(pdf_path, prefer_cloud=prefer_cloud)
+                chars = None if text is None else len(text)
+        seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    if chars is None:
+        # A failed backend finishes fast; timing it would read as a speedup
+        print(f"{backend} produced no result", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps({
+        "pages": len(page_nums),
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(len(page_nums) / seconds, 2) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "chars": chars,
+        **({"winner": winner} if backend == "hedge" else {}),
+    }))
+
+
+def backend_available(backend, fixture=None):
+    """Whether a backend can run here (on fixture, if given), or why not."""
+    scans = []
+    if fixture is not None:
+        pages, is_scan = FIXTURES[fixture]
+        scans = [is_scan(n) for n in range(pages)]
+    needs_ocr = backend == "ocr" or (backend == "hybrid" and any(scans))
+    if needs_ocr and not shutil.which("tesseract"):
+        return "tesseract not installed"
+    if backend in CLOUD_BACKENDS and not os.environ.get("LLAMA_CLOUD_BASE_URL"):
+        return "use --stub-llamaparse (or set LLAMA_CLOUD_BASE_URL to a local stub)"
+    if backend == "hedge" and scans and all(scans):
+        return "image-only, neither side of the race can extract it"
+    return None
+
+
+def run_backend(path, backend, workers, prefer_cloud=DEFAULT_PREFER_CLOUD):
+    """Run one backend on one PDF in a fresh interpreter; returns its result."""
+    env = dict(os.environ)
+    env.setdefault("LLAMA_CLOUD_API_KEY", "bench-stub")
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-one", path,
+         "--backends", backend, "--workers", str(workers),
+         "--prefer-cloud", str(prefer_cloud)],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()
+        return {"error": err[-1] if err else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_suite(paths, backends, workers, prefer_cloud=DEFAULT_PREFER_CLOUD):
+    """Run every backend on every fixture, each in a fresh interpreter."""
+    results = []
+    for name, path in paths.items():
+        for backend in backends:
+            reason = backend_available(backend, name)
+            if reason:
+                print(f"  {name} / {backend}: skipped ({reason})", file=sys.stderr)
+                continue
+            print(f"  {name} / {backend}...", file=sys.stderr)
+            result = run_backend(path, backend, workers, prefer_cloud)
+            results.append({"fixture": name, "backend": backend, **result})
+    return results
+
+
+def check_hedge(path, stub):
+    """Race against the stub twice: a fast cloud result must win, a slow one lose.
+
+    Returns a list of problems (empty if the hedge behaves).
+    """
+    problems = []
+    saved = stub.delay
+    # (stub delay, prefer_cloud, expected winner, max seconds)
+    cases = [(0, 10, "llamaparse", 10), (30, 1, "pymupdf4llm", 15)]
+    try:
+        for delay, prefer_cloud, expected, max_seconds in cases:
+            print(f"  hedge: cloud {delay}s, prefer-cloud {prefer_cloud}s...", file=sys.stderr)
+            stub.delay = delay
+            r = run_backend(path, "hedge", workers=1, prefer_cloud=prefer_cloud)
+            label = f"hedge (cloud {delay}s, prefer-cloud {prefer_cloud}s)"
+            if "error" in r:
+                problems.append(f"{label}: {r['error']}")
+            elif r["winner"] != expected:
+                problems.append(f"{label}: expected {expected} to win, got {r['winner']}")
+            elif r["seconds"] > max_seconds:
+                problems.append(f"{label}: took {r['seconds']}s (limit {max_seconds}s)")
+    finally:
+        stub.delay = saved
+    return problems
+
+
+def compare(results, baseline):
+    """Annotate results with baseline deltas; returns list of regressions."""
+    base = {(r["fixture"], r["backend"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["fixture"], r["backend"]))
+        if not b or "error" in r or "error" in b:
+            continue
+        problems = []
+        if b["pages_per_sec"] and r["pages_per_sec"] < b["pages_per_sec"] * (1 - MAX_SLOWDOWN):
+            problems.append(f"pages/s {b['pages_per_sec']} -> {r['pages_per_sec']}")
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + MAX_RSS_GROWTH):
+            problems.append(f"peak RSS {b['peak_rss_mb']} -> {r['peak_rss_mb']} MB")
+        if b["chars"] and abs(r["chars"] - b["chars"]) > b["chars"] * MAX_CHARS_DRIFT:
+            problems.append(f"chars {b['chars']:,} -> {r['chars']:,}")
+        r["speedup"] = round(r["pages_per_sec"] / b["pages_per_sec"], 2) if b["pages_per_sec"] else None
+        if problems:
+            regressions.append(f"{r['fixture']} / {r['backend']}: " + "; ".join(problems))
+    return regressions
+
+
+def print_table(results):
+    """Print results as an aligned table."""
+    print(f"{'fixture':<12} {'backend':<12} {'pages':>6} {'sec':>8} {'pages/s':>8} "
+          f"{'RSS MB':>8} {'chars':>10} {'vs base':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['fixture']:<12} {r['backend']:<12} {'':>6} failed: {r['error']}")
+            continue
+        speedup = f"{r['speedup']:.2f}x" if r.get("speedup") else ""
+        print(f"{r['fixture']:<12} {r['backend']:<12} {r['pages']:>6} {r['seconds']:>8.2f} "
+              f"{r['pages_per_sec']:>8.1f} {r['peak_rss_mb']:>8.1f} {r['chars']:>10,} {speedup:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark pdf_extract backends on generated fixtures",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--quick", action="store_true", help="Small fixtures only")
+    parser.add_argument("--backends", default=",".join(ALL_BACKENDS),
+                        help="Comma-separated backends to run")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="OCR worker processes (default: 1, 0 = one per CPU core)")
+    parser.add_argument("--stub-llamaparse", action="store_true",
+                        help="Serve a local LlamaParse stand-in for the llamaparse and hedge backends")
+    parser.add_argument("--stub-delay", type=float, default=0.0, metavar="SECONDS",
+                        help="Seconds the stub takes per job (default: 0)")
+    parser.add_argument("--prefer-cloud", type=float, default=DEFAULT_PREFER_CLOUD, metavar="SECONDS",
+                        help=f"--prefer-cloud for the hedge backend (default: {DEFAULT_PREFER_CLOUD})")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_DIR, help="Fixture directory")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--run-one", metavar="PDF", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(backends) - set(ALL_BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+
+    if args.run_one:
+        run_one(args.run_one, backends[0], args.workers, args.prefer_cloud)
+        return
+
+    stub = None
+    if args.stub_llamaparse:
+        stub = LlamaParseStub(delay=args.stub_delay)
+        os.environ["LLAMA_CLOUD_BASE_URL"] = stub.url
+        print(f"LlamaParse stub at {stub.url}", file=sys.stderr)
+
+    runnable = []
+    for backend in backends:
+        reason = backend_available(backend)
+        if reason:
+            print(f"Skipping {backend}: {reason}", file=sys.stderr)
+        else:
+            runnable.append(backend)
+
+    names = QUICK_FIXTURES if args.quick else list(FIXTURES)
+    paths = ensure_fixtures(args.fixtures, names)
+
+    print(f"Running {len(runnable)} backends on {len(paths)} fixtures...", file=sys.stderr)
+    results = run_suite(paths, runnable, args.workers, args.prefer_cloud)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+    if stub and "hedge" in runnable:
+        regressions += check_hedge(paths[names[0]], stub)
+    # A failed run has no timing worth keeping, and mustn't become the baseline
+    regressions += [f"{r['fixture']} / {r['backend']}: failed: {r['error']}"
+                    for r in results if "error" in r]
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print()
+        print_table(results)
+
+    if args.save_baseline and not regressions:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "workers": args.workers, "results": results}, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}", file=sys.stderr)
+    elif regressions:
+        print(f"\n✗ {len(regressions)} regressions:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
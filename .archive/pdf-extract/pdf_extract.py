@@ -6,184 +6,1282 @@
 PDF Extract - Extract text from PDFs including large/image-based documents.
 
 Usage:
-    uv run pdf_extract.py <pdf-path-or-url> [output-path] [--local]
+    uv run pdf_extract.py <pdf-path-or-url> [output-path] [options]
+    uv run pdf_extract.py --batch <dir|glob|url-list> [output-dir] [options]
 
 Options:
-    --local    Force local OCR instead of LlamaParse API
+    --local           Force local OCR instead of LlamaParse API
+    --workers N       OCR pages (or --batch files) across N processes (0 = one per CPU core)
+    --pages R         Only process pages R, e.g. 10-50 (1-based)
+    --batch           Extract many PDFs; one .md each plus manifest.jsonl
+    --hedge           Race LlamaParse against local pymupdf4llm; first valid result wins
+    --prefer-cloud S  With --hedge, wait up to S more seconds for LlamaParse
+    --resume          Reuse OCR pages checkpointed by an interrupted run
+    --no-cache        Don't read or write the extraction cache
+    --refresh         Ignore cached results but store fresh ones
 
 Examples:
     uv run pdf_extract.py /tmp/salary_guide.pdf
     uv run pdf_extract.py https://example.com/report.pdf
     uv run pdf_extract.py document.pdf --local
+    uv run pdf_extract.py scanned.pdf --local --workers 0
+    uv run pdf_extract.py --batch ~/filings /tmp/filings-md --workers 8
 """
 
+import argparse
+import glob
+import hashlib
+import json
 import sys
 import os
-import tempfile
+import re
+import time
 import urllib.request
 import urllib.parse
 
 # LlamaParse API key - get from https://cloud.llamaindex.ai
 # Set LLAMA_CLOUD_API_KEY env var to enable cloud parsing
 LLAMA_PARSE_API_KEY = os.environ.get("LLAMA_CLOUD_API_KEY")
+# Optional endpoint override, e.g. a local stand-in server for testing
+LLAMA_PARSE_BASE_URL = os.environ.get("LLAMA_CLOUD_BASE_URL")
 
+# Hedged cascade: how long to keep waiting for LlamaParse once the local
+# extractor already has a valid result (seconds)
+DEFAULT_PREFER_CLOUD_SECONDS = 15
 
-def download_if_url(source):
-    """Download PDF if source is a URL, return local path."""
+# Extraction cache - results keyed by PDF content hash + backend + settings
+CACHE_DIR = os.environ.get(
+    "PDF_EXTRACT_CACHE_DIR", os.path.expanduser("~/.cache/pdf-extract")
+)
+CACHE_MAX_MB = int(os.environ.get("PDF_EXTRACT_CACHE_MAX_MB", "512"))
+
+# OCR render resolution, picked per page (PDF user space is 72 DPI)
+DEFAULT_OCR_DPI = 150
+MIN_OCR_DPI = 100
+MAX_OCR_DPI = 300
+# Pixel budget per rendered page (A4 at 300 DPI is ~8.7M), caps large formats
+MAX_OCR_PIXELS = 12_000_000
+# Tesseract reads best with ~24px per em: font size (pt) * dpi / 72 >= 24
+OCR_EM_PIXELS = 24
+# Cache settings key for OCR output (change it when rendering changes)
+OCR_CACHE_SETTINGS = f"gray-dpi{MIN_OCR_DPI}-{MAX_OCR_DPI}"
+
+# Per-page OCR robustness: tesseract timeout (seconds) and retries on failure
+OCR_PAGE_TIMEOUT = 300
+OCR_PAGE_RETRIES = 2
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    """On-disk LRU cache of extraction results for one document.
+
+    Entries are keyed by the document's SHA-256 plus backend and settings,
+    optionally per page, so a partially failed OCR run keeps the pages that
+    succeeded. Reads bump the entry's mtime; evict() drops the least recently
+    used entries until the cache fits in max_bytes.
+    """
+
+    def __init__(self, doc_hash, root=CACHE_DIR, max_bytes=CACHE_MAX_MB << 20,
+                 read=True, write=True):
+        self.doc_hash = doc_hash
+        self.root = root
+        self.max_bytes = max_bytes
+        self.read = read
+        self.write = write
+        self.hits = 0
+
+    def _path(self, backend, settings="", page=None):
+        key = f"{self.doc_hash}:{backend}:{settings}"
+        if page is not None:
+            key += f":p{page}"
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ".md")
+
+    def get(self, backend, settings="", page=None):
+        """Return the cached text, or None on a miss."""
+        if not self.read:
+            return None
+        path = self._path(backend, settings, page)
+        try:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return None
+        os.utime(path)
+        self.hits += 1
+        return text
+
+    def has(self, backend, settings="", page=None):
+        """Whether an entry exists (without reading it)."""
+        return self.read and os.path.exists(self._path(backend, settings, page))
+
+    def put(self, backend, text, settings="", page=None):
+        """Store text atomically (temp file + rename)."""
+        if not self.write or text is None:
+            return
+        path = self._path(backend, settings, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def get_file(self, backend, dest, settings=""):
+        """Copy a cached entry to dest; returns False on a miss."""
+        import shutil
+
+        if not self.read:
+            return False
+        path = self._path(backend, settings)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(path, tmp)
+        except OSError:
+            return False
+        os.replace(tmp, dest)
+        os.utime(path)
+        self.hits += 1
+        return True
+
+    def put_file(self, backend, src, settings=""):
+        """Store a copy of the file at src (without reading it into memory)."""
+        import shutil
+
+        if not self.write:
+            return
+        path = self._path(backend, settings)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+
+    def evict(self):
+        """Delete least recently used entries until under max_bytes."""
+        if self.write:
+            evict_lru(self.root, ".md", self.max_bytes)
+
+
+def evict_lru(root, suffix, max_bytes, keep=None):
+    """Delete the oldest files ending in suffix under root until under max_bytes.
+
+    keep (a path) is never deleted, even if it alone is over the limit.
+    """
+    if not os.path.isdir(root):
+        return
+    entries = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if not name.endswith(suffix):
+                continue  # other kinds of entry, locks, temp files
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+class OCRCheckpoint:
+    """Per-page OCR progress in a sidecar directory next to the output.
+
+    The directory is keyed by document hash (<output>.ckpt-<sha12>/) and
+    holds one file per finished page plus failed.json (1-based page -> error)
+    for pages that gave up after retries. Without resume any previous
+    checkpoint is discarded; pages written during this run are always
+    reusable (e.g. when the cascade falls back from hybrid to full OCR).
+    The directory is only created when the first page is written, so runs
+    that never OCR anything leave nothing behind; clear() removes it after a
+    clean run.
+    """
+
+    def __init__(self, output_path, doc_hash, resume=False):
+        import shutil
+
+        self.dir = f"{output_path}.ckpt-{doc_hash[:12]}"
+        if not resume and os.path.isdir(self.dir):
+            print(f"Discarding previous checkpoint {self.dir} (use --resume to continue it)")
+            shutil.rmtree(self.dir)
+        self._failed_path = os.path.join(self.dir, "failed.json")
+        self.failed = {}
+        if os.path.exists(self._failed_path):
+            with open(self._failed_path, encoding='utf-8') as f:
+                self.failed = {int(k) - 1: v for k, v in json.load(f).items()}
+
+    def _path(self, page_num):
+        return os.path.join(self.dir, f"page-{page_num + 1:05d}.txt")
+
+    def has(self, page_num):
+        return os.path.exists(self._path(page_num))
+
+    def get(self, page_num):
+        with open(self._path(page_num), encoding='utf-8') as f:
+            return f.read()
+
+    def put(self, page_num, text):
+        os.makedirs(self.dir, exist_ok=True)
+        path = self._path(page_num)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+        if self.failed.pop(page_num, None) is not None:
+            self._save_failed()
+
+    def fail(self, page_num, error):
+        self.failed[page_num] = error
+        self._save_failed()
+
+    def _save_failed(self):
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self._failed_path, 'w', encoding='utf-8') as f:
+            json.dump({str(k + 1): v for k, v in sorted(self.failed.items())}, f, indent=2)
+
+    def clear(self):
+        import shutil
+
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+# Downloaded PDFs live under the cache dir, named by content hash, with
+# their own LRU size cap
+DOWNLOAD_DIR = os.path.join(CACHE_DIR, "downloads")
+DOWNLOAD_MAX_MB = int(os.environ.get("PDF_EXTRACT_DOWNLOAD_MAX_MB", "2048"))
+DOWNLOAD_CHUNK = 1 << 20
+DOWNLOAD_RETRIES = 3
+# Socket timeout (seconds) for connecting and for each read
+DOWNLOAD_TIMEOUT = 60
+
+
+def _url_key(url):
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def download_pdf(url, download_dir=DOWNLOAD_DIR):
+    """Download url into the content-addressed download cache.
+
+    Returns (local_path, sha256). The body is streamed in chunks and hashed
+    as it is written, so the caller never re-reads the file to hash it.
+    A previous download of the same URL is revalidated with ETag /
+    If-Modified-Since (304 = reuse it), and an interrupted download resumes
+    from its .part file with a Range request. The final file is named by
+    its SHA-256, so concurrent runs on different URLs never collide.
+    Older downloads are evicted once the directory exceeds DOWNLOAD_MAX_MB.
+    """
+    import fcntl
+    import http.client
+    import urllib.error
+
+    os.makedirs(download_dir, exist_ok=True)
+    key = _url_key(url)
+    meta_path = os.path.join(download_dir, f"{key}.json")
+    part_path = os.path.join(download_dir, f"{key}.part")
+    part_meta_path = f"{part_path}.json"
+
+    # One downloader per URL at a time; others wait and then revalidate
+    with open(os.path.join(download_dir, f"{key}.lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            meta = _read_json(meta_path)
+            if meta and not os.path.exists(meta.get('path', '')):
+                meta = None
+            part_meta = _read_json(part_meta_path) if os.path.exists(part_path) else None
+
+            headers = {"User-Agent": "pdf-extract"}
+            offset = 0
+            if part_meta and (part_meta.get('etag') or part_meta.get('last_modified')):
+                offset = os.path.getsize(part_path)
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = part_meta.get('etag') or part_meta['last_modified']
+            elif meta:
+                if meta.get('etag'):
+                    headers["If-None-Match"] = meta['etag']
+                if meta.get('last_modified'):
+                    headers["If-Modified-Since"] = meta['last_modified']
+
+            try:
+                response = urllib.request.urlopen(
+                    urllib.request.Request(url, headers=headers), timeout=DOWNLOAD_TIMEOUT
+                )
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and meta:
+                    print("Using cached download (not modified).")
+                    os.utime(meta['path'])
+                    return meta['path'], meta['sha256']
+                if e.code == 416:
+                    # Stale partial; start over
+                    os.remove(part_path)
+                    continue
+                raise
+
+            with response:
+                h = hashlib.sha256()
+                if response.status == 206:
+                    print(f"Resuming download at {offset / (1024 * 1024):.1f} MB...")
+                    with open(part_path, 'rb') as f:
+                        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b''):
+                            h.update(chunk)
+                    mode = 'ab'
+                else:
+                    offset = 0
+                    mode = 'wb'
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                _write_json(part_meta_path, {'url': url, **validators})
+
+                length = response.headers.get('Content-Length')
+                expected = offset + int(length) if length else None
+                received = offset
+                try:
+                    with open(part_path, mode) as f:
+                        for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK), b''):
+                            f.write(chunk)
+                            h.update(chunk)
+                            received += len(chunk)
+                except (OSError, http.client.HTTPException) as e:
+                    print(f"Download interrupted at {received / (1024 * 1024):.1f} MB: {e}")
+                    continue
+                if expected is not None and received < expected:
+                    print(f"Download cut short at {received / (1024 * 1024):.1f} MB, resuming...")
+                    continue
+
+            sha256 = h.hexdigest()
+            path = os.path.join(download_dir, f"{sha256}.pdf")
+            os.replace(part_path, path)
+            os.remove(part_meta_path)
+            _write_json(meta_path, {'url': url, 'path': path, 'sha256': sha256,
+                                    'size': received, **validators})
+            evict_lru(download_dir, ".pdf", DOWNLOAD_MAX_MB << 20, keep=path)
+            return path, sha256
+
+        raise RuntimeError(f"Download failed after {DOWNLOAD_RETRIES + 1} attempts: {url}")
+
+
+def download_if_url(source, download_dir=DOWNLOAD_DIR):
+    """Download PDF if source is a URL; return (local path, sha256 or None)."""
     if source.startswith(('http://', 'https://')):
         print(f"Downloading from URL...")
-        filename = os.path.basename(source.split('?')[0]) or 'document.pdf'
-        filename = urllib.parse.unquote(filename) if '%' in filename else filename
-        if not filename.endswith('.pdf'):
-            filename += '.pdf'
-        local_path = os.path.join(tempfile.gettempdir(), filename)
-        urllib.request.urlretrieve(source, local_path)
+        local_path, sha256 = download_pdf(source, download_dir)
         print(f"Downloaded to: {local_path}")
-        return local_path
-    return source
+        return local_path, sha256
+    return source, None
 
 
-def extract_with_llamaparse(pdf_path):
-    """Extract using LlamaParse cloud API."""
+def extract_with_llamaparse(pdf_path, cache=None, pages=None):
+    """Extract using LlamaParse cloud API (optionally only some 0-based pages)."""
+    settings = "markdown" if pages is None else "markdown:" + ",".join(map(str, pages))
+    if cache and (text := cache.get("llamaparse", settings)) is not None:
+        print("Using cached LlamaParse result.")
+        return text
     try:
         from llama_parse import LlamaParse
 
+        options = {}
+        if LLAMA_PARSE_BASE_URL:
+            options["base_url"] = LLAMA_PARSE_BASE_URL
+        if pages is not None:
+            options["target_pages"] = ",".join(map(str, pages))
         parser = LlamaParse(
             api_key=LLAMA_PARSE_API_KEY,
             result_type="markdown",
-            verbose=True
+            verbose=True,
+            **options
         )
 
         print("Uploading to LlamaParse...")
         documents = parser.load_data(pdf_path)
+        if not documents:
+            # llama_parse reports job errors and returns nothing
+            print("LlamaParse returned no documents")
+            return None
 
         # Combine all document chunks
         full_text = "\n\n".join([doc.text for doc in documents])
+        if cache:
+            cache.put("llamaparse", full_text, settings)
         return full_text
     except Exception as e:
         print(f"LlamaParse failed: {e}")
         return None
 
 
-def extract_with_pymupdf4llm(pdf_path):
-    """Try fast local extraction with pymupdf4llm."""
+def extract_with_pymupdf4llm(pdf_path, cache=None, pages=None):
+    """Try fast local extraction with pymupdf4llm (optionally only some 0-based pages)."""
+    settings = "" if pages is None else ",".join(map(str, pages))
+    if cache and (text := cache.get("pymupdf4llm", settings)) is not None:
+        print("Using cached pymupdf4llm result.")
+        return text
     try:
         import pymupdf4llm
-        md_text = pymupdf4llm.to_markdown(pdf_path)
+        md_text = pymupdf4llm.to_markdown(pdf_path, pages=pages)
+        if cache:
+            cache.put("pymupdf4llm", md_text, settings)
         return md_text
     except Exception as e:
         print(f"pymupdf4llm failed: {e}")
         return None
 
 
-def extract_with_ocr(pdf_path):
-    """Fall back to local OCR for image-based PDFs."""
+def _race_extract(backend, pdf_path, cache, pages):
+    """Pool entry point for one contender in race_backends()."""
+    if backend == "llamaparse":
+        text = extract_with_llamaparse(pdf_path, cache=cache, pages=pages)
+    else:
+        text = extract_with_pymupdf4llm(pdf_path, cache=cache, pages=pages)
+    return backend, text if is_extraction_valid(text) else None
+
+
+def race_backends(pdf_path, cache=None, pages=None,
+                  prefer_cloud=DEFAULT_PREFER_CLOUD_SECONDS):
+    """Run LlamaParse and pymupdf4llm concurrently; return (backend, text).
+
+    LlamaParse wins whenever it produces a valid result first. If the local
+    extractor finishes first, keep waiting up to prefer_cloud seconds for
+    the higher-quality cloud result before settling for the local one. The
+    loser's process is killed. Returns (None, None) if neither is valid.
+    """
+    import multiprocessing
+    import queue
+
+    results = queue.Queue()
+    pool = multiprocessing.Pool(2)
+    try:
+        for backend in ("llamaparse", "pymupdf4llm"):
+            pool.apply_async(
+                _race_extract,
+                (backend, pdf_path, cache, pages),
+                callback=results.put,
+                error_callback=lambda e, backend=backend: results.put((backend, None)),
+            )
+
+        local_text = None
+        deadline = None
+        for _ in range(2):
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                backend, text = results.get(timeout=timeout)
+            except queue.Empty:
+                print(f"LlamaParse still running after {prefer_cloud}s, using pymupdf4llm.")
+                break
+            if backend == "llamaparse":
+                if text:
+                    return backend, text
+                print("LlamaParse extraction insufficient.")
+                if local_text:
+                    break
+            elif text:
+                local_text = text
+                deadline = time.monotonic() + prefer_cloud
+                print(f"pymupdf4llm finished first, waiting up to {prefer_cloud}s for LlamaParse...")
+            else:
+                print("pymupdf4llm extraction insufficient.")
+        return ("pymupdf4llm", local_text) if local_text else (None, None)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def choose_ocr_dpi(page):
+    """Pick a render DPI for one page from its scan resolution, text and size.
+
+    - Scanned pages are rendered at the embedded image's own resolution;
+      going finer only adds pixels for tesseract to chew through.
+    - Small fonts in any text layer push the DPI up so glyphs stay legible.
+    - Large-format pages are capped by a total pixel budget.
+    """
+    dpi = DEFAULT_OCR_DPI
+
+    images = [
+        info for info in page.get_image_info()
+        if info["bbox"][2] - info["bbox"][0] > 0 and info.get("width")
+    ]
+    if images:
+        largest = max(images, key=lambda i: abs(page.rect & i["bbox"]))
+        bbox_width_in = (largest["bbox"][2] - largest["bbox"][0]) / 72
+        dpi = largest["width"] / bbox_width_in
+
+    sizes = sorted(
+        span["size"]
+        for block in page.get_text("dict")["blocks"]
+        for line in block.get("lines", ())
+        for span in line["spans"]
+        if span["text"].strip()
+    )
+    if sizes:
+        small = sizes[len(sizes) // 10]
+        dpi = max(dpi, OCR_EM_PIXELS * 72 / max(small, 1))
+
+    dpi = min(max(dpi, MIN_OCR_DPI), MAX_OCR_DPI)
+
+    area_in2 = abs(page.rect) / (72 * 72)
+    if area_in2 and dpi * dpi * area_in2 > MAX_OCR_PIXELS:
+        dpi = (MAX_OCR_PIXELS / area_in2) ** 0.5
+    return dpi
+
+
+def ocr_page(page):
+    """OCR a single PyMuPDF page and return its text."""
     import fitz  # PyMuPDF
     import pytesseract
     from PIL import Image
-    import io
 
-    print("Using local OCR extraction...")
-    doc = fitz.open(pdf_path)
-    full_text = []
-    total_pages = len(doc)
+    scale = choose_ocr_dpi(page) / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False)
+    # Wrap the pixmap's samples in place (no PNG encode/decode round trip).
+    # pytesseract hands images to the tesseract CLI through a temp file; BMP
+    # makes that a plain memory dump instead of a zlib-compressed PNG.
+    img = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", pix.stride, 1)
+    img.format = "BMP"
+    try:
+        return pytesseract.image_to_string(img, timeout=OCR_PAGE_TIMEOUT)
+    finally:
+        # Drop the view on pix.samples before the pixmap is freed
+        del img
+
+
+class OCRUnavailable(RuntimeError):
+    """OCR can't run at all (tesseract missing), so retrying pages is pointless."""
+
+
+def ocr_page_with_retry(page):
+    """OCR a page, retrying failures; returns (text, None) or (None, error).
+
+    Raises OCRUnavailable straight away when tesseract isn't installed.
+    """
+    try:
+        import pytesseract
+    except ImportError as e:
+        raise OCRUnavailable(f"{type(e).__name__}: {e}") from None
+
+    for attempt in range(OCR_PAGE_RETRIES + 1):
+        try:
+            return ocr_page(page), None
+        except (pytesseract.TesseractNotFoundError, FileNotFoundError) as e:
+            raise OCRUnavailable(f"{type(e).__name__}: {e}") from None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt < OCR_PAGE_RETRIES:
+                time.sleep(2 ** attempt)
+    return None, error
+
+
+# Per-process document handle for parallel OCR workers
+_worker_doc = None
+
+
+def _init_ocr_worker(pdf_path):
+    """Open the document once per worker process."""
+    global _worker_doc
+    import fitz  # PyMuPDF
+
+    # Tesseract is multithreaded by default; with one process per core that
+    # just oversubscribes the CPU, so pin each worker to a single thread.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _worker_doc = fitz.open(pdf_path)
+
+
+def _ocr_worker_page(page_num):
+    """OCR one page of the worker's document."""
+    return (page_num, *ocr_page_with_retry(_worker_doc[page_num]))
+
+
+def resolve_workers(workers):
+    """Turn a --workers value into a process count (0 = all cores)."""
+    if workers is None or workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+
+def iter_ocr_pages(pdf_path, page_nums, workers=1, cache=None, checkpoint=None):
+    """Yield (page_num, "--- Page N ---" text) in page order, OCRing as needed.
+
+    Pages already in the checkpoint or cache are reused; each new page is
+    stored in both as soon as it finishes. A page that still fails after
+    retries is recorded in the checkpoint and replaced by a marker instead of
+    aborting the run. In parallel mode at most two pages per worker are in
+    flight, so memory stays flat however long the document.
+    """
+    import fitz  # PyMuPDF
+
+    settings = OCR_CACHE_SETTINGS
+    page_nums = list(page_nums)
+    total = len(page_nums)
+
+    stored = {}
+    for page_num in page_nums:
+        if checkpoint and checkpoint.has(page_num):
+            stored[page_num] = checkpoint
+        elif cache and cache.has("ocr", settings, page=page_num):
+            stored[page_num] = cache
+    if stored:
+        resumed = sum(1 for src in stored.values() if src is checkpoint)
+        print(f"  {len(stored)} pages already done ({resumed} from checkpoint, "
+              f"{len(stored) - resumed} from cache)")
+    todo = [n for n in page_nums if n not in stored]
+
+    workers = min(resolve_workers(workers), max(len(todo), 1))
+    if todo:
+        print(f"Processing {len(todo)} pages with OCR ({workers} worker{'s' if workers != 1 else ''})...")
+
+    def load(page_num):
+        src = stored[page_num]
+        if src is checkpoint:
+            text = checkpoint.get(page_num)
+        else:
+            text = cache.get("ocr", settings, page=page_num)
+        return page_num, f"--- Page {page_num + 1} ---\n{text}"
+
+    def finish(done, page_num, text, error):
+        if error:
+            print(f"  Page {page_num + 1} failed OCR: {error}")
+            if checkpoint:
+                checkpoint.fail(page_num, error)
+            text = f"[OCR failed: {error}]"
+        else:
+            if cache:
+                cache.put("ocr", text, settings, page=page_num)
+            if checkpoint:
+                checkpoint.put(page_num, text)
+        if done % 10 == 0 or done == total:
+            print(f"  Processed {done}/{total} pages...")
+        return page_num, f"--- Page {page_num + 1} ---\n{text}"
+
+    if workers == 1:
+        with fitz.open(pdf_path) as doc:
+            for done, page_num in enumerate(page_nums, 1):
+                if page_num in stored:
+                    yield load(page_num)
+                else:
+                    yield finish(done, page_num, *ocr_page_with_retry(doc[page_num]))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_ocr_worker,
+        initargs=(pdf_path,),
+    ) as pool:
+        ahead = iter(todo)
+        in_flight = {}
+        for page_num in ahead:
+            in_flight[page_num] = pool.submit(_ocr_worker_page, page_num)
+            if len(in_flight) >= workers * 2:
+                break
+
+        for done, page_num in enumerate(page_nums, 1):
+            if page_num in stored:
+                yield load(page_num)
+                continue
+            _, text, error = in_flight.pop(page_num).result()
+            next_page = next(ahead, None)
+            if next_page is not None:
+                in_flight[next_page] = pool.submit(_ocr_worker_page, next_page)
+            yield finish(done, page_num, text, error)
 
-    print(f"Processing {total_pages} pages with OCR...")
 
-    for page_num in range(total_pages):
-        page = doc[page_num]
-        mat = fitz.Matrix(2, 2)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        img = Image.open(io.BytesIO(img_data))
-        text = pytesseract.image_to_string(img)
-        full_text.append(f"--- Page {page_num + 1} ---\n{text}")
+# A page is sent to OCR when it has almost no text layer but is mostly image
+MIN_PAGE_TEXT_CHARS = 50
+MIN_IMAGE_COVERAGE = 0.5
 
-        if (page_num + 1) % 10 == 0 or page_num + 1 == total_pages:
-            print(f"  Processed {page_num + 1}/{total_pages} pages...")
+# Pages per pymupdf4llm call when converting text-layer pages
+NATIVE_BATCH_PAGES = 25
 
-    doc.close()
-    return "\n\n".join(full_text)
+
+def page_image_coverage(page):
+    """Fraction of the page area covered by images (0.0 - 1.0)."""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]
+        if not bbox.is_empty:
+            covered += abs(bbox)
+    return min(covered / page_area, 1.0)
+
+
+def classify_pages(pdf_path, page_nums=None):
+    """Split page numbers into (native, ocr) by text layer and image coverage."""
+    import fitz  # PyMuPDF
+
+    native, ocr = [], []
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(len(doc)) if page_nums is None else page_nums:
+            page = doc[page_num]
+            chars = count_nonspace(page.get_text())
+            if chars < MIN_PAGE_TEXT_CHARS and page_image_coverage(page) >= MIN_IMAGE_COVERAGE:
+                ocr.append(page_num)
+            else:
+                native.append(page_num)
+    return native, ocr
+
+
+def iter_native_pages(pdf_path, page_nums, cache=None):
+    """Yield (page_num, markdown) for text-layer pages via pymupdf4llm."""
+    import fitz  # PyMuPDF
+    import pymupdf4llm
+
+    with fitz.open(pdf_path) as doc:
+        for i in range(0, len(page_nums), NATIVE_BATCH_PAGES):
+            batch = page_nums[i:i + NATIVE_BATCH_PAGES]
+            pages = {}
+            if cache:
+                for page_num in batch:
+                    text = cache.get("pymupdf4llm", page=page_num)
+                    if text is not None:
+                        pages[page_num] = text
+            todo = [n for n in batch if n not in pages]
+            if todo:
+                chunks = pymupdf4llm.to_markdown(doc, pages=todo, page_chunks=True)
+                for page_num, chunk in zip(todo, chunks):
+                    pages[page_num] = chunk["text"]
+                    if cache:
+                        cache.put("pymupdf4llm", chunk["text"], page=page_num)
+            for page_num in batch:
+                yield page_num, pages.pop(page_num)
+
+
+def iter_hybrid_pages(pdf_path, page_nums, workers=1, cache=None, checkpoint=None):
+    """Yield (page_num, text) in order: text layer where present, else OCR."""
+    native, ocr = classify_pages(pdf_path, page_nums)
+    print(f"  {len(native)} pages with text layer, {len(ocr)} image-only pages")
+
+    native_pages = iter_native_pages(pdf_path, native, cache=cache)
+    ocr_pages = iter_ocr_pages(pdf_path, ocr, workers=workers, cache=cache, checkpoint=checkpoint)
+    ocr_set = set(ocr)
+    for page_num in page_nums:
+        yield next(ocr_pages if page_num in ocr_set else native_pages)
+
+
+_NONSPACE = re.compile(r'\S+')
+
+
+def count_nonspace(text, limit=None):
+    """Count non-whitespace characters without copying text.
+
+    Stops early once the count exceeds limit.
+    """
+    count = 0
+    for m in _NONSPACE.finditer(text):
+        count += m.end() - m.start()
+        if limit is not None and count > limit:
+            break
+    return count
 
 
 def is_extraction_valid(text, min_chars=500):
     """Check if extraction produced meaningful content."""
     if not text:
         return False
-    cleaned = ''.join(text.split())
-    return len(cleaned) > min_chars
+    return count_nonspace(text, limit=min_chars) > min_chars
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: uv run pdf_extract.py <pdf-path-or-url> [output-path] [--local]")
-        print("\nOptions:")
-        print("  --local    Force local OCR instead of LlamaParse API")
-        print("\nExamples:")
-        print("  uv run pdf_extract.py /tmp/salary_guide.pdf")
-        print("  uv run pdf_extract.py https://example.com/report.pdf")
-        print("  uv run pdf_extract.py document.pdf --local")
-        sys.exit(1)
+def write_pages(pages, output_path, min_chars=500):
+    """Stream (page_num, text) pairs to output_path as they arrive.
 
-    # Parse arguments
-    args = [a for a in sys.argv[1:] if not a.startswith('--')]
-    use_local = '--local' in sys.argv
+    Validity is judged from a running non-whitespace count, so no full copy
+    of the document is ever held. Returns {'chars', 'preview'} on success;
+    if the pages come out below min_chars (or the producer fails) nothing is
+    written and None is returned. min_chars=None accepts any output.
+    OCRUnavailable is re-raised, since every later backend would hit it too.
+    """
+    tmp_path = f"{output_path}.part"
+    chars = nonspace = 0
+    preview = ""
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for i, (_, text) in enumerate(pages):
+                if i:
+                    f.write("\n\n")
+                    chars += 2
+                    if len(preview) < 500:
+                        preview += "\n\n"
+                f.write(text)
+                chars += len(text)
+                if min_chars is not None and nonspace <= min_chars:
+                    nonspace += count_nonspace(text, limit=min_chars)
+                if len(preview) < 500:
+                    preview += text[:500]
+    except OCRUnavailable:
+        os.remove(tmp_path)
+        raise
+    except Exception as e:
+        print(f"Extraction failed: {e}")
+        os.remove(tmp_path)
+        return None
 
-    source = args[0]
-    pdf_path = download_if_url(source)
+    if min_chars is not None and nonspace <= min_chars:
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, output_path)
+    return {'chars': chars, 'preview': preview}
 
-    if not os.path.exists(pdf_path):
-        print(f"Error: File not found: {pdf_path}")
-        sys.exit(1)
 
-    file_size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
-    print(f"File size: {file_size_mb:.1f} MB")
+def parse_page_range(spec, total_pages):
+    """Parse a 1-based page spec like "10-50", "7", "-20", "3-" or "1-3,9".
 
-    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-    base_name = base_name.replace('%20', '_').replace(' ', '_')
-    output_path = args[1] if len(args) > 1 else f"/tmp/{base_name}.md"
+    Returns sorted 0-based page numbers clipped to the document.
+    """
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, _, end = part.partition('-')
+            first = int(start) if start.strip() else 1
+            last = int(end) if end.strip() else total_pages
+        else:
+            first = last = int(part)
+        pages.update(range(max(first, 1) - 1, min(last, total_pages)))
+    if not pages:
+        raise ValueError(f"Page range {spec!r} selects no pages (document has {total_pages})")
+    return sorted(pages)
 
-    print(f"Extracting: {pdf_path}")
-    print(f"Output: {output_path}")
 
-    text = None
+def extract_document(pdf_path, output_path, use_llamaparse=True, workers=1,
+                     page_nums=None, cache=None, hedge=False,
+                     prefer_cloud=DEFAULT_PREFER_CLOUD_SECONDS, checkpoint=None):
+    """Run the extraction cascade on one PDF, streaming to output_path.
+
+    OCR progress goes to checkpoint (an OCRCheckpoint) when given; it is
+    removed once the document finishes with no failed pages.
+
+    With hedge, LlamaParse and pymupdf4llm race instead of running one after
+    the other (see race_backends).
+
+    Returns {'backend', 'pages', 'chars', 'seconds', 'preview',
+    'failed_pages'}, or None if every backend failed. Raises OCRUnavailable
+    when pages need OCR but tesseract isn't installed.
+    """
+    start = time.monotonic()
+    cloud = use_llamaparse and LLAMA_PARSE_API_KEY
+    doc_settings = ":".join([
+        ("hedge" if hedge else "cloud") if cloud else "local",
+        "all" if page_nums is None else ",".join(map(str, page_nums)),
+        OCR_CACHE_SETTINGS,
+    ])
+    if cache:
+        # A finished document is served whole, before classifying any page
+        meta = cache.get("document-meta", doc_settings)
+        if meta and cache.get_file("document", output_path, doc_settings):
+            print("\nUsing cached result for the whole document.")
+            result = json.loads(meta)
+            result.update(seconds=round(time.monotonic() - start, 2),
+                          failed_pages=[])
+            return result
+
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as doc:
+        total_pages = len(doc)
+    ranged = page_nums is not None
+    if not ranged:
+        page_nums = list(range(total_pages))
+
+    result = None
+    backend = None
+
+    if hedge and cloud:
+        # Race LlamaParse (cloud) against pymupdf4llm (local)
+        print("\n[1/3] Racing LlamaParse (cloud) against pymupdf4llm (local)...")
+        backend, text = race_backends(
+            pdf_path, cache=cache, pages=page_nums if ranged else None,
+            prefer_cloud=prefer_cloud,
+        )
+        if text:
+            result = write_pages([(None, text)], output_path, min_chars=None)
+            print(f"{backend} extraction successful.")
 
-    if not use_local and LLAMA_PARSE_API_KEY:
+    elif cloud:
         # Try LlamaParse first (cloud API)
         print("\n[1/3] Trying LlamaParse (cloud API)...")
-        text = extract_with_llamaparse(pdf_path)
+        text = extract_with_llamaparse(
+            pdf_path, cache=cache, pages=page_nums if ranged else None
+        )
 
         if is_extraction_valid(text):
+            result = write_pages([(None, text)], output_path, min_chars=None)
+            backend = "llamaparse"
             print("LlamaParse extraction successful.")
         else:
             print("LlamaParse extraction insufficient.")
-            text = None
 
-    if not text:
-        # Try pymupdf4llm (fast local)
-        print("\n[2/3] Trying pymupdf4llm (local)...")
-        text = extract_with_pymupdf4llm(pdf_path)
+    if not result:
+        # pymupdf4llm for pages with a text layer, OCR for image-only pages
+        print("\n[2/3] Trying pymupdf4llm + per-page OCR (local)...")
+        result = write_pages(
+            iter_hybrid_pages(pdf_path, page_nums, workers=workers, cache=cache,
+                              checkpoint=checkpoint),
+            output_path,
+        )
+        backend = "hybrid"
 
-        if is_extraction_valid(text):
-            print("pymupdf4llm extraction successful.")
+        if result:
+            print("Hybrid extraction successful.")
         else:
-            print("pymupdf4llm extraction insufficient, PDF likely image-based.")
-            text = None
+            print("Hybrid extraction insufficient, text layer likely unusable.")
 
-    if not text:
+    if not result:
         # Fall back to OCR (slow but reliable for images)
         print("\n[3/3] Falling back to local OCR...")
-        text = extract_with_ocr(pdf_path)
+        result = write_pages(
+            iter_ocr_pages(pdf_path, page_nums, workers=workers, cache=cache,
+                           checkpoint=checkpoint),
+            output_path,
+            min_chars=None,
+        )
+        backend = "ocr"
+
+    if not result:
+        return None
+    failed_pages = sorted(n + 1 for n in checkpoint.failed) if checkpoint else []
+    if checkpoint and not failed_pages:
+        checkpoint.clear()
+    result.update(
+        backend=backend,
+        pages=len(page_nums),
+        seconds=round(time.monotonic() - start, 2),
+        failed_pages=failed_pages,
+    )
+    # Only cache what a rerun would produce: no failed pages, and no local
+    # fallback standing in for a cloud result that may succeed next time
+    if cache and not failed_pages and (not cloud or backend == "llamaparse"):
+        cache.put_file("document", output_path, doc_settings)
+        cache.put("document-meta", json.dumps({
+            key: result[key] for key in ("backend", "pages", "chars", "preview")
+        }), doc_settings)
+    if cache:
+        cache.evict()
+    return result
+
+
+def output_name(source):
+    """Default output file name (without directory) for a PDF path or URL."""
+    if source.startswith(('http://', 'https://')):
+        source = urllib.parse.unquote(urllib.parse.urlparse(source).path) or 'document.pdf'
+    base_name = os.path.splitext(os.path.basename(source))[0] or 'document'
+    base_name = base_name.replace('%20', '_').replace(' ', '_')
+    return f"{base_name}.md"
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(text)
 
-    print(f"\n✓ Done! Output written to: {output_path}")
-    print(f"  Total characters: {len(text):,}")
+def collect_batch_sources(spec):
+    """Expand a batch spec: a URL, a directory, a glob, or a file of URLs/paths."""
+    if spec.startswith(('http://', 'https://')):
+        return [spec]
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, '**', '*.pdf'), recursive=True))
+    if os.path.isfile(spec) and not spec.lower().endswith('.pdf'):
+        with open(spec, encoding='utf-8') as f:
+            return [
+                line.strip() for line in f
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+    return sorted(glob.glob(spec, recursive=True))
 
-    preview = text[:500].replace('\n', ' ')[:200]
+
+def source_stamp(source):
+    """Size and mtime of a local source, used to skip unchanged files."""
+    if source.startswith(('http://', 'https://')) or not os.path.exists(source):
+        return {}
+    st = os.stat(source)
+    return {'size': st.st_size, 'mtime': int(st.st_mtime)}
+
+
+def load_manifest(manifest_path):
+    """Latest manifest record per source."""
+    records = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['source']] = record
+    return records
+
+
+def _batch_extract(source, output_path, use_llamaparse, use_cache, refresh, hedge,
+                   prefer_cloud, resume):
+    """Extract one batch item quietly; returns its manifest record."""
+    import contextlib
+    import io
+    import tempfile
+
+    record = {'source': source, 'output': output_path, **source_stamp(source)}
+    log = io.StringIO()
+    start = time.monotonic()
+    try:
+        with contextlib.redirect_stdout(log), contextlib.ExitStack() as stack:
+            download_dir = DOWNLOAD_DIR
+            if not use_cache:
+                download_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="pdf-extract-"))
+            pdf_path, doc_hash = download_if_url(source, download_dir)
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"File not found: {pdf_path}")
+            doc_hash = doc_hash or file_sha256(pdf_path)
+            cache = ExtractionCache(doc_hash, read=not refresh) if use_cache else None
+            result = extract_document(
+                pdf_path, output_path, use_llamaparse=use_llamaparse, cache=cache,
+                hedge=hedge, prefer_cloud=prefer_cloud,
+                checkpoint=OCRCheckpoint(output_path, doc_hash, resume=resume),
+            )
+        if result is None:
+            raise RuntimeError("all backends failed")
+        record.update(
+            status='partial' if result['failed_pages'] else 'ok',
+            backend=result['backend'],
+            pages=result['pages'],
+            chars=result['chars'],
+            seconds=result['seconds'],
+            failed_pages=result['failed_pages'],
+        )
+    except Exception as e:
+        record.update(status='error', error=str(e), seconds=round(time.monotonic() - start, 2))
+    return record
+
+
+def run_batch(spec, out_dir, use_llamaparse=True, workers=1, use_cache=True, refresh=False,
+              hedge=False, prefer_cloud=DEFAULT_PREFER_CLOUD_SECONDS, resume=False):
+    """Extract every PDF in spec into out_dir, appending to manifest.jsonl.
+
+    Files are spread over a process pool, largest first so one big document
+    doesn't straggle at the end. Sources already recorded as done (and
+    unchanged since) are skipped.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    sources = collect_batch_sources(spec)
+    if not sources:
+        print(f"Error: no PDFs found for {spec}")
+        sys.exit(1)
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, 'manifest.jsonl')
+    done = load_manifest(manifest_path)
+
+    todo = []
+    names = set()
+    skipped = 0
+    for source in sources:
+        prev = done.get(source)
+        if (not refresh and prev and prev.get('status') == 'ok'
+                and not prev.get('failed_pages')
+                and os.path.exists(prev['output'])
+                and all(prev.get(k) == v for k, v in source_stamp(source).items())):
+            names.add(os.path.basename(prev['output']))
+            skipped += 1
+            continue
+        name = output_name(source)
+        if name in names:
+            digest = hashlib.sha256(source.encode()).hexdigest()[:8]
+            name = f"{os.path.splitext(name)[0]}-{digest}.md"
+        names.add(name)
+        todo.append((source, os.path.join(out_dir, name)))
+
+    # Largest first; URLs have unknown size so they go up front too
+    todo.sort(key=lambda item: -source_stamp(item[0]).get('size', float('inf')))
+
+    workers = min(resolve_workers(workers), max(len(todo), 1))
+    print(f"Batch: {len(sources)} files, {skipped} already done, {len(todo)} to extract ({workers} worker{'s' if workers != 1 else ''})")
+    print(f"Manifest: {manifest_path}\n")
+
+    failed = partial = 0
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_batch_extract, source, output_path, use_llamaparse, use_cache, refresh,
+                        hedge, prefer_cloud, resume)
+            for source, output_path in todo
+        ]
+        for n, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+            if record['status'] == 'ok':
+                print(f"  [{n}/{len(todo)}] ✓ {record['source']} "
+                      f"({record['backend']}, {record['pages']} pages, "
+                      f"{record['chars']:,} chars, {record['seconds']}s)")
+            elif record['status'] == 'partial':
+                partial += 1
+                print(f"  [{n}/{len(todo)}] ✗ {record['source']} "
+                      f"({record['backend']}, {record['pages']} pages) "
+                      f"— OCR failed on pages {record['failed_pages']}")
+            else:
+                failed += 1
+                print(f"  [{n}/{len(todo)}] ✗ {record['source']}: {record['error']}")
+
+    print(f"\n{'✗' if failed or partial else '✓'} Batch done: "
+          f"{len(todo) - failed - partial} extracted, {partial} incomplete, "
+          f"{failed} failed, {skipped} skipped")
+    if partial:
+        print("  Re-run with --resume to retry just the failed OCR pages.")
+    if failed or partial:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract text from PDFs including large/image-based documents",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("source", help="PDF path or URL (with --batch: directory, glob, or URL list file)")
+    parser.add_argument("output", nargs="?",
+                        help="Output path (default: /tmp/<name>.md; with --batch: output directory)")
+    parser.add_argument("--local", action="store_true",
+                        help="Force local OCR instead of LlamaParse API")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="OCR worker processes, or files in parallel with --batch "
+                             "(default: 1, 0 = one per CPU core)")
+    parser.add_argument("--pages",
+                        help="Only process these pages, e.g. 10-50 or 1-3,9 (1-based)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Extract many PDFs, writing one .md each plus manifest.jsonl")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Race LlamaParse against local pymupdf4llm instead of waiting on the cloud")
+    parser.add_argument("--prefer-cloud", type=float, default=DEFAULT_PREFER_CLOUD_SECONDS,
+                        metavar="SECONDS",
+                        help="With --hedge, extra time to wait for LlamaParse after the local "
+                             f"result is ready (default: {DEFAULT_PREFER_CLOUD_SECONDS}, 0 = first valid wins)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse OCR pages checkpointed by an interrupted run and retry failed ones")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Don't read or write the extraction or download cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore cached results (and finished batch entries) but store fresh ones")
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.pages:
+            parser.error("--pages can't be combined with --batch")
+        run_batch(
+            args.source,
+            args.output or "/tmp/pdf-extract-batch",
+            use_llamaparse=not args.local,
+            workers=args.workers,
+            use_cache=not args.no_cache,
+            refresh=args.refresh,
+            hedge=args.hedge,
+            prefer_cloud=args.prefer_cloud,
+            resume=args.resume,
+        )
+        return
+
+    download_dir = DOWNLOAD_DIR
+    if args.no_cache:
+        # Keep the download only for this run
+        import atexit
+        import shutil
+        import tempfile
+
+        download_dir = tempfile.mkdtemp(prefix="pdf-extract-")
+        atexit.register(shutil.rmtree, download_dir, ignore_errors=True)
+    pdf_path, doc_hash = download_if_url(args.source, download_dir)
+
+    if not os.path.exists(pdf_path):
+        print(f"Error: File not found: {pdf_path}")
+        sys.exit(1)
+
+    file_size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+    print(f"File size: {file_size_mb:.1f} MB")
+
+    page_nums = None
+    if args.pages:
+        import fitz  # PyMuPDF
+
+        with fitz.open(pdf_path) as doc:
+            total_pages = len(doc)
+        try:
+            page_nums = parse_page_range(args.pages, total_pages)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    output_path = args.output or os.path.join("/tmp", output_name(args.source))
+
+    print(f"Extracting: {pdf_path}")
+    if page_nums is not None:
+        print(f"Pages: {args.pages} ({len(page_nums)} of {total_pages})")
+    print(f"Output: {output_path}")
+
+    doc_hash = doc_hash or file_sha256(pdf_path)
+    cache = None
+    if not args.no_cache:
+        cache = ExtractionCache(doc_hash, read=not args.refresh)
+    checkpoint = OCRCheckpoint(output_path, doc_hash, resume=args.resume)
+
+    try:
+        result = extract_document(
+            pdf_path,
+            output_path,
+            use_llamaparse=not args.local,
+            workers=args.workers,
+            page_nums=page_nums,
+            cache=cache,
+            hedge=args.hedge,
+            prefer_cloud=args.prefer_cloud,
+            checkpoint=checkpoint,
+        )
+    except OCRUnavailable as e:
+        print(f"Error: OCR unavailable ({e}); install tesseract")
+        sys.exit(1)
+
+    if not result:
+        print("Error: extraction failed")
+        sys.exit(1)
+
+    if result['failed_pages']:
+        print(f"\n✗ Incomplete! Output written to: {output_path}")
+    else:
+        print(f"\n✓ Done! Output written to: {output_path}")
+    print(f"  Total characters: {result['chars']:,}")
+    print(f"  Elapsed: {result['seconds']:.2f}s"
+          + (f" ({cache.hits} cache hits)" if cache and cache.hits else ""))
+    if result['failed_pages']:
+        print(f"  OCR failed on pages {result['failed_pages']} (see {checkpoint.dir}/failed.json)")
+        print("  Re-run with --resume to retry just those pages.")
+
+    preview = result['preview'][:500].replace('\n', ' ')[:200]
     print(f"  Preview: {preview}...")
+    if result['failed_pages']:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
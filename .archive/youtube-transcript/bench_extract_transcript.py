@@ -0,0 +1,325 @@
+# /// script
+# dependencies = []
+# ///
+
+"""
+YouTube Transcript Benchmark - Throughput and memory of transcript processing.
+
+Generates synthetic VTT fixtures (1 minute to 6 hours; manual captions,
+manual captions that repeat lines, auto-caption rolling cues, tag-heavy
+cues) and a list of video URLs, then
+times parse_vtt_to_text, clean_transcript_text and extract_video_id on them.
+Reports MB/s (best of several runs), peak traced memory and output size.
+Results can be saved as a baseline and later runs compared against it, so a
+slower or hungrier change shows up as a regression. Manual-caption fixtures
+must also parse exactly as they do with rolling-cue dedupe off. Fully offline.
+
+Usage:
+    uv run bench_extract_transcript.py [options]
+
+Options:
+    --quick           Short fixtures only (fast smoke run)
+    --ops OP,..       Operations to run: parse,clean,video-id
+    --baseline FILE   Baseline JSON (default: ~/.cache/youtube-transcript/bench-baseline.json)
+    --save-baseline   Store this run as the new baseline
+    --json            Print results as JSON
+
+Examples:
+    uv run bench_extract_transcript.py --quick
+    uv run bench_extract_transcript.py --save-baseline
+    uv run bench_extract_transcript.py --ops parse
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Regression thresholds relative to the baseline
+MAX_SLOWDOWN = 0.15        # MB/s may drop by at most 15%
+MAX_MEM_GROWTH = 0.25      # peak traced memory may grow by at most 25%
+MAX_OUTPUT_DRIFT = 0.01    # output characters may change by at most 1%
+
+DEFAULT_BASELINE = os.path.expanduser("~/.cache/youtube-transcript/bench-baseline.json")
+
+ALL_OPS = ["parse", "clean", "video-id"]
+
+# Keep timing a fixture until this much time has passed (and at least MIN_RUNS)
+MIN_BENCH_SECONDS = 0.5
+MIN_RUNS = 3
+
+# name -> (VTT style, duration in minutes)
+FIXTURES = {
+    "manual-1m": ("manual", 1),
+    "rolling-1m": ("rolling", 1),
+    "tags-1m": ("tags", 1),
+    "repeats-1m": ("repeats", 1),
+    "manual-10m": ("manual", 10),
+    "rolling-10m": ("rolling", 10),
+    "tags-10m": ("tags", 10),
+    "repeats-10m": ("repeats", 10),
+    "manual-1h": ("manual", 60),
+    "rolling-1h": ("rolling", 60),
+    "tags-1h": ("tags", 60),
+    "repeats-1h": ("repeats", 60),
+    "manual-6h": ("manual", 360),
+    "rolling-6h": ("rolling", 360),
+    "tags-6h": ("tags", 360),
+}
+QUICK_FIXTURES = ["manual-1m", "rolling-1m", "tags-1m", "repeats-1m",
+                  "manual-10m", "rolling-10m", "tags-10m", "repeats-10m"]
+
+URL_COUNT = 20000
+
+WORDS = (
+    "so the thing about vector databases is that latency really matters when "
+    "you are serving embeddings at scale and most teams underestimate how much "
+    "the index build costs compared to the query path which is usually fine"
+).split()
+SPEAKERS = ["HOST", "GUEST", "ALEX", "SAM"]
+ANNOTATIONS = ["[Music]", "[Applause]", "[Laughter]"]
+
+
+def vtt_time(ms):
+    """Format milliseconds as a VTT timestamp."""
+    seconds, millis = divmod(ms, 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.{millis:03d}"
+
+
+def make_vtt(style, minutes, seed=0):
+    """Build a deterministic VTT document of the given style and length."""
+    rng = random.Random(f"{style}-{minutes}-{seed}")
+    end_ms = minutes * 60000
+    out = ["WEBVTT\nKind: captions\nLanguage: en\n"]
+
+    def words(n):
+        return [rng.choice(WORDS) for _ in range(n)]
+
+    t = 0
+    cue = 0
+    prev = ""
+    while t < end_ms:
+        cue += 1
+        length = rng.randint(2000, 4000)
+        if style == "rolling":
+            # YouTube auto captions: the previous line is repeated on top of a
+            # new line carrying per-word timing tags, then a 10ms cue holds
+            # the finished line before the next roll
+            new = words(rng.randint(5, 9))
+            step = length // len(new)
+            timed = new[0] + "".join(
+                f"<{vtt_time(t + step * i)}><c> {w}</c>" for i, w in enumerate(new[1:], 1)
+            )
+            out.append(f"{vtt_time(t)} --> {vtt_time(t + length)} align:start position:0%\n"
+                       f"{prev}\n{timed}\n")
+            prev = " ".join(new)
+            out.append(f"{vtt_time(t + length)} --> {vtt_time(t + length + 10)} "
+                       f"align:start position:0%\n{prev}\n \n")
+            t += length + 10
+            continue
+
+        text = " ".join(words(rng.randint(6, 14)))
+        if style == "repeats" and prev and rng.random() < 0.3:
+            # Manual captions repeat a line ("No." / "No.") or extend it
+            # ("I" / "I love you."); these must survive rolling-cue dedupe
+            text = prev if rng.random() < 0.5 else f"{prev} {' '.join(words(3))}"
+        prev = text
+        if style == "tags":
+            text = " ".join(
+                f"<c.colorE5E5E5>{w}</c>" if i % 3 else f"<i>{w}</i>"
+                for i, w in enumerate(text.split())
+            )
+            text = f"<v {rng.choice(SPEAKERS).title()}>{text}</v>"
+        elif rng.random() < 0.1:
+            text = f">> {rng.choice(SPEAKERS)}: {text}"
+        if rng.random() < 0.05:
+            text = f"{rng.choice(ANNOTATIONS)} {text}"
+        out.append(f"{cue}\n{vtt_time(t)} --> {vtt_time(t + length)}\n{text}\n")
+        t += length
+    return "\n".join(out)
+
+
+def make_urls(count, seed=0):
+    """Mixed watch/short/embed URLs and bare IDs, as pasted by users."""
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+    forms = [
+        "https://www.youtube.com/watch?v={}",
+        "https://www.youtube.com/watch?v={}&t=42s&list=PL123",
+        "https://youtu.be/{}",
+        "https://www.youtube.com/embed/{}",
+        "https://www.youtube.com/shorts/{}",
+        "{}",
+    ]
+    return [rng.choice(forms).format("".join(rng.choices(alphabet, k=11)))
+            for _ in range(count)]
+
+
+def time_op(fn, arg):
+    """Best wall time of fn(arg) over repeated runs; returns (seconds, result)."""
+    best = None
+    result = None
+    runs = 0
+    started = time.perf_counter()
+    while runs < MIN_RUNS or time.perf_counter() - started < MIN_BENCH_SECONDS:
+        t0 = time.perf_counter()
+        result = fn(arg)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+    return best, result
+
+
+def traced_peak_mb(fn, arg):
+    """Peak Python memory allocated while running fn(arg) once, in MB."""
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def measure(fixture, op, fn, arg, input_bytes):
+    seconds, output = time_op(fn, arg)
+    out_chars = sum(map(len, output)) if isinstance(output, list) else len(output)
+    return {
+        "fixture": fixture,
+        "op": op,
+        "input_mb": round(input_bytes / 1e6, 3),
+        "seconds": round(seconds, 5),
+        "mb_per_sec": round(input_bytes / 1e6 / seconds, 2) if seconds else None,
+        "peak_mem_mb": round(traced_peak_mb(fn, arg), 2),
+        "out_chars": out_chars,
+    }
+
+
+def run_suite(names, ops):
+    """Generate each fixture and run the requested operations on it."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import extract_transcript as yt
+
+    results = []
+    for name in names:
+        style, minutes = FIXTURES[name]
+        vtt = make_vtt(style, minutes)
+        size = len(vtt.encode("utf-8"))
+        print(f"  {name} ({size / 1e6:.2f} MB)...", file=sys.stderr)
+        text = yt.parse_vtt_to_text(vtt)
+        if "parse" in ops:
+            results.append(measure(name, "parse", yt.parse_vtt_to_text, vtt, size))
+        if "clean" in ops:
+            results.append(measure(name, "clean", yt.clean_transcript_text, text,
+                                   len(text.encode("utf-8"))))
+
+    if "video-id" in ops:
+        urls = make_urls(URL_COUNT)
+        size = sum(len(u) for u in urls)
+        print(f"  urls-{URL_COUNT // 1000}k...", file=sys.stderr)
+        results.append(measure(f"urls-{URL_COUNT // 1000}k", "video-id",
+                               lambda items: [yt.extract_video_id(u) for u in items],
+                               urls, size))
+    return results
+
+
+def check_manual_captions(names):
+    """Manual-caption fixtures must parse as they do with dedupe off."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import extract_transcript as yt
+
+    problems = []
+    for name in names:
+        style, minutes = FIXTURES[name]
+        if style == "rolling":
+            continue
+        vtt = make_vtt(style, minutes)
+        if yt.parse_vtt_to_text(vtt) != yt.parse_vtt_to_text(vtt, dedupe=False):
+            problems.append(f"{name} / parse: manual caption lines were collapsed")
+    return problems
+
+
+def compare(results, baseline):
+    """Annotate results with baseline deltas; returns list of regressions."""
+    base = {(r["fixture"], r["op"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["fixture"], r["op"]))
+        if not b:
+            continue
+        problems = []
+        if b["mb_per_sec"] and r["mb_per_sec"] < b["mb_per_sec"] * (1 - MAX_SLOWDOWN):
+            problems.append(f"MB/s {b['mb_per_sec']} -> {r['mb_per_sec']}")
+        if r["peak_mem_mb"] > b["peak_mem_mb"] * (1 + MAX_MEM_GROWTH):
+            problems.append(f"peak memory {b['peak_mem_mb']} -> {r['peak_mem_mb']} MB")
+        if b["out_chars"] and abs(r["out_chars"] - b["out_chars"]) > b["out_chars"] * MAX_OUTPUT_DRIFT:
+            problems.append(f"output chars {b['out_chars']:,} -> {r['out_chars']:,}")
+        r["speedup"] = round(r["mb_per_sec"] / b["mb_per_sec"], 2) if b["mb_per_sec"] else None
+        if problems:
+            regressions.append(f"{r['fixture']} / {r['op']}: " + "; ".join(problems))
+    return regressions
+
+
+def print_table(results):
+    """Print results as an aligned table."""
+    print(f"{'fixture':<12} {'op':<9} {'in MB':>7} {'sec':>9} {'MB/s':>8} "
+          f"{'peak MB':>8} {'out chars':>11} {'vs base':>8}")
+    for r in results:
+        speedup = f"{r['speedup']:.2f}x" if r.get("speedup") else ""
+        print(f"{r['fixture']:<12} {r['op']:<9} {r['input_mb']:>7.2f} {r['seconds']:>9.4f} "
+              f"{r['mb_per_sec']:>8.1f} {r['peak_mem_mb']:>8.2f} {r['out_chars']:>11,} {speedup:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark transcript parsing and cleaning on synthetic fixtures",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--quick", action="store_true", help="Short fixtures only")
+    parser.add_argument("--ops", default="parse,clean,video-id",
+                        help="Comma-separated operations to run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    ops = [o.strip() for o in args.ops.split(",") if o.strip()]
+    unknown = set(ops) - set(ALL_OPS)
+    if unknown:
+        parser.error(f"unknown ops: {', '.join(sorted(unknown))}")
+
+    names = QUICK_FIXTURES if args.quick else list(FIXTURES)
+    print(f"Running {len(ops)} operations on {len(names)} fixtures...", file=sys.stderr)
+    results = run_suite(names, ops)
+
+    regressions = check_manual_captions(names) if "parse" in ops else []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions += compare(results, json.load(f))
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print()
+        print_table(results)
+
+    if args.save_baseline and not regressions:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\n✓ Baseline saved to {args.baseline}", file=sys.stderr)
+    elif regressions:
+        print(f"\n✗ {len(regressions)} regressions vs {args.baseline}:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
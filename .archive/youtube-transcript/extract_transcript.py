@@ -9,22 +9,60 @@ Extract transcripts from YouTube videos using yt-dlp (primary) with youtube-tran
 
 Usage:
     uv run extract_transcript.py <video_id_or_url> [options]
+    uv run extract_transcript.py search <query> [-n N] [--video ID] [--json]
 
 Examples:
     uv run extract_transcript.py dQw4w9WgXcQ
     uv run extract_transcript.py "https://www.youtube.com/watch?v=VIDEO_ID"
     uv run extract_transcript.py VIDEO_ID --browser chrome  # Use Chrome cookies
     uv run extract_transcript.py VIDEO_ID --cookies /path/to/cookies.txt  # Use exported cookies
+    uv run extract_transcript.py VIDEO_ID --hedge  # Race yt-dlp and the API, first wins
+    uv run extract_transcript.py VIDEO_ID --format srt -o talk.srt
+    uv run extract_transcript.py VIDEO_ID --format chunks --chunk-tokens 2000  # JSONL for LLMs
+    uv run extract_transcript.py "https://www.youtube.com/playlist?list=LIST_ID" --batch -o /tmp/talks
+    uv run extract_transcript.py ids.txt --batch --concurrency 8 -o /tmp/talks.jsonl --index
+    uv run extract_transcript.py search "vector database" -n 5
 """
 
 import argparse
+import contextlib
+import functools
+import hashlib
 import html
+import json
 import os
+import queue
 import re
-import subprocess
+import sqlite3
 import sys
-import tempfile
-from pathlib import Path
+import threading
+import time
+from array import array
+from urllib.parse import urlparse
+
+YOUTUBE_HOST = "www.youtube.com"
+
+# --format choices, with the file extension each uses in batch directories
+FORMAT_EXTENSIONS = {
+    'text': 'txt', 'json': 'json', 'srt': 'srt', 'markdown': 'md', 'chunks': 'jsonl',
+}
+
+# Hedged fetching - head start yt-dlp gets before the API joins the race
+DEFAULT_HEDGE_DELAY = 2.0
+# Most threads racing fetches at once (losers still in flight count too)
+HEDGE_WORKERS = 16
+
+# Transcript cache - raw cues keyed by video, languages and method
+CACHE_DIR = os.environ.get(
+    "YT_TRANSCRIPT_CACHE_DIR", os.path.expanduser("~/.cache/youtube-transcript")
+)
+CACHE_MAX_MB = int(os.environ.get("YT_TRANSCRIPT_CACHE_MAX_MB", "256"))
+CACHE_TTL_DAYS = 30
+AUTO_CACHE_TTL_DAYS = 7
+
+# Full-text search index - segments grouped into passages of about this long
+INDEX_PATH = os.environ.get("YT_TRANSCRIPT_INDEX", os.path.join(CACHE_DIR, "index.sqlite"))
+INDEX_PASSAGE_MS = 20000
 
 
 def extract_video_id(url_or_id: str) -> str:
@@ -40,149 +78,312 @@ def extract_video_id(url_or_id: str) -> str:
     return url_or_id.strip()
 
 
-def clean_transcript_text(text: str, remove_annotations: bool = True) -> str:
+# Cleanup rules, applied in order: (pattern, replacement)
+ANNOTATION_RULE = (r'\[[^\]]*\]', '')                 # [Music], [Applause]
+SPEAKER_RULES = (
+    (r'(?:^|\s)>>?\s*[A-Z][A-Z\s]*:', ''),              # >> HOST:
+    (r'(?:^|\s)(?i:SPEAKER)\s*\d*:', ''),               # Speaker 2:
+    (r'(?:^|\s)-\s*[A-Za-z]+:', ''),                    # - Name:
+)
+
+_START_OR_SPACE = r'(?:^|\s)'
+_INLINE_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+
+class TranscriptCleaner:
+    r"""Ordered regex cleanup rules, unescaping and whitespace normalisation.
+
+    Output is identical to running re.sub for each rule in turn, then
+    collapsing whitespace, but cheaper:
+
+    - one scan with all rules fused into an alternation decides whether any
+      rule can apply at all; text none of them touch skips every pass
+    - a rule led by (?:^|\s) runs as the equivalent \s-led pattern unless it
+      matches at offset 0, which lets the regex engine skip ahead instead of
+      trying the ^ branch at every position
+    - whitespace is collapsed with str.split/join rather than a regex
+
+    Rules are (pattern, replacement) pairs; patterns may be strings or
+    compiled. Fusing can't stand in for the ordered passes themselves: one
+    rule's removals can create or destroy another's matches.
+
+    extra_rules run after rules but stay out of the fused scan: arbitrary
+    user patterns (inline global flags, named groups, backreferences) don't
+    survive being joined, so each is searched on its own instead.
+    """
+
+    def __init__(self, rules, extra_rules=()):
+        self.rules = []
+        branches = []
+        for pattern, repl in rules:
+            full, lead = self._compile(pattern)
+            self.rules.append((full, lead, repl))
+            branches.append(self._inline(lead or full))
+        self._extra = []
+        for pattern, repl in extra_rules:
+            full, lead = self._compile(pattern)
+            self.rules.append((full, lead, repl))
+            self._extra.append(full)
+        self._any = None
+        if branches and None not in branches:
+            try:
+                self._any = re.compile('|'.join(branches))
+            except re.error:
+                pass  # can't be fused; every pass runs
+
+    @staticmethod
+    def _compile(pattern):
+        r"""(pattern, its \s-led equivalent or None), both compiled."""
+        full = re.compile(pattern)
+        lead = None
+        if full.pattern.startswith(_START_OR_SPACE) and not full.flags & re.MULTILINE:
+            lead = re.compile(r'\s' + full.pattern[len(_START_OR_SPACE):], full.flags)
+        return full, lead
+
+    @staticmethod
+    def _inline(pattern):
+        """pattern as a group carrying its own flags, or None if it can't be."""
+        if pattern.flags & re.ASCII:
+            return None
+        letters = ''.join(c for flag, c in _INLINE_FLAGS if pattern.flags & flag)
+        return f"(?{letters}:{pattern.pattern})" if letters else f"(?:{pattern.pattern})"
+
+    def _touched(self, text: str) -> bool:
+        if self._any is None:
+            return True
+        return (self._any.search(text) is not None
+                or any(full.match(text) for full, _, _ in self.rules)
+                or any(pattern.search(text) for pattern in self._extra))
+
+    def clean(self, text: str) -> str:
+        text = html.unescape(text)
+        if self._touched(text):
+            for full, lead, repl in self.rules:
+                if lead is not None and not full.match(text):
+                    text = lead.sub(repl, text)
+                else:
+                    text = full.sub(repl, text)
+        return ' '.join(text.split())
+
+
+@functools.lru_cache(maxsize=None)
+def get_cleaner(remove_annotations: bool = True, extra_rules: tuple = ()) -> TranscriptCleaner:
+    """Shared cleaner for the built-in rules plus any extra (pattern, replacement) rules."""
+    rules = [ANNOTATION_RULE] if remove_annotations else []
+    return TranscriptCleaner(rules + list(SPEAKER_RULES), extra_rules)
+
+
+def clean_transcript_text(text: str, remove_annotations: bool = True,
+                          extra_rules: tuple = ()) -> str:
     """Clean transcript text by removing artifacts."""
-    text = html.unescape(text)
-    if remove_annotations:
-        text = re.sub(r'\[[^\]]*\]', '', text)
-    text = re.sub(r'(?:^|\s)>>?\s*[A-Z][A-Z\s]*:', '', text)
-    text = re.sub(r'(?:^|\s)SPEAKER\s*\d*:', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'(?:^|\s)-\s*[A-Za-z]+:', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-
-def parse_vtt_to_text(vtt_content: str, include_timestamps: bool = False) -> str:
-    """Parse VTT subtitle content to plain text."""
-    lines = vtt_content.split('\n')
-    result = []
-    current_text = []
-    current_timestamp = None
+    return get_cleaner(remove_annotations, tuple(extra_rules)).clean(text)
+
+
+_VTT_TIME = r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})'
+_VTT_TIMING = re.compile(_VTT_TIME + r'\s*-->\s*' + _VTT_TIME)
+_VTT_TAG = re.compile(r'<[^>]+>')
+_VTT_BLANK = frozenset(('', '\n', '\r\n', '\r'))
+# Rolling auto captions hold each finished line in a ~10ms cue
+ROLLING_HOLD_MS = 50
+
+
+def format_ms(ms: int) -> str:
+    """Format milliseconds as mm:ss (minutes keep counting past an hour)."""
+    return f"{ms // 60000:02d}:{ms // 1000 % 60:02d}"
+
+
+def iter_vtt_cues(lines, dedupe: bool = None):
+    """Yield (start_ms, end_ms, text) per cue in a single pass over lines.
+
+    lines is any iterable of lines (a file object streams without loading
+    the whole file). Header, NOTE/STYLE blocks and cue identifiers are
+    skipped; inline tags are stripped.
+
+    YouTube auto-caption rolling cues repeat the previous line before adding
+    a new one; collapsing them drops a line equal to the last one and keeps
+    only the new words of a line that extends it. dedupe=True collapses
+    throughout (auto-generated tracks), False never does (manual captions
+    legitimately repeat lines), and None starts collapsing once the track
+    shows the rolling layout: a short hold cue abutting the previous cue.
+    """
+    start = end = None
+    in_cue = False
+    cue_lines = []
+    last = ''
+    rolling = bool(dedupe)
 
     for line in lines:
+        if line in _VTT_BLANK:
+            if cue_lines:
+                yield start, end, ' '.join(cue_lines)
+                cue_lines = []
+            in_cue = False
+            continue
         line = line.strip()
-        if line.startswith('WEBVTT') or line.startswith('Kind:') or line.startswith('Language:') or not line:
-            if current_text:
-                if include_timestamps and current_timestamp:
-                    result.append(f"[{current_timestamp}] {' '.join(current_text)}")
-                else:
-                    result.append(' '.join(current_text))
-                current_text = []
+        if not line:
+            # YouTube pads auto-caption cues with whitespace-only lines;
+            # only a truly empty line ends a cue.
             continue
         if '-->' in line:
-            if current_text:
-                if include_timestamps and current_timestamp:
-                    result.append(f"[{current_timestamp}] {' '.join(current_text)}")
-                else:
-                    result.append(' '.join(current_text))
-                current_text = []
-            start_time = line.split('-->')[0].strip()
-            parts = start_time.split(':')
-            if len(parts) == 3:
-                mins = int(parts[0]) * 60 + int(parts[1])
-                secs = parts[2].split('.')[0]
-                current_timestamp = f"{mins:02d}:{secs}"
-            else:
-                mins = parts[0]
-                secs = parts[1].split('.')[0]
-                current_timestamp = f"{mins}:{secs}"
+            match = _VTT_TIMING.match(line)
+            if match:
+                if cue_lines:
+                    yield start, end, ' '.join(cue_lines)
+                    cue_lines = []
+                prev_end = end
+                h1, m1, s1, f1, h2, m2, s2, f2 = match.groups()
+                start = int(m1) * 60000 + int(s1 + f1)
+                end = int(m2) * 60000 + int(s2 + f2)
+                if h1:
+                    start += int(h1) * 3600000
+                if h2:
+                    end += int(h2) * 3600000
+                if (dedupe is None and not rolling and prev_end is not None
+                        and start <= prev_end and end - start <= ROLLING_HOLD_MS):
+                    rolling = True
+                in_cue = True
+                continue
+        if not in_cue:
             continue
-        if line.isdigit():
-            continue
-        line = re.sub(r'<[^>]+>', '', line)
-        if line:
-            current_text.append(line)
+        if '<' in line:
+            line = _VTT_TAG.sub('', line).strip()
+            if not line:
+                continue
+        if rolling:
+            if line == last:
+                continue
+            if last and line.startswith(last + ' '):
+                extra = line[len(last):].strip()
+                last = line
+                cue_lines.append(extra)
+                continue
+        last = line
+        cue_lines.append(line)
 
-    if current_text:
-        if include_timestamps and current_timestamp:
-            result.append(f"[{current_timestamp}] {' '.join(current_text)}")
-        else:
-            result.append(' '.join(current_text))
+    if cue_lines:
+        yield start, end, ' '.join(cue_lines)
 
-    return '\n'.join(result) if include_timestamps else ' '.join(result)
 
+def parse_vtt_to_text(vtt_content, include_timestamps: bool = False,
+                      dedupe: bool = None) -> str:
+    """Parse VTT subtitle content (a string or iterable of lines) to plain text."""
+    lines = vtt_content.splitlines() if isinstance(vtt_content, str) else vtt_content
+    cues = iter_vtt_cues(lines, dedupe=dedupe)
+    if include_timestamps:
+        return '\n'.join(f"[{format_ms(start)}] {text}" for start, _, text in cues)
+    return ' '.join(text for _, _, text in cues)
 
-def get_transcript_ytdlp(
-    video_id: str,
-    languages: list[str] = None,
-    include_timestamps: bool = False,
-    browser: str = None,
-    cookies_file: str = None
-) -> tuple[str, dict]:
-    """Fetch transcript using yt-dlp."""
-    if languages is None:
-        languages = ['en']
 
-    url = f"https://www.youtube.com/watch?v={video_id}"
+# One YoutubeDL per (thread, auth settings), reused across videos so the
+# extractor setup and HTTP session are paid for once
+_ytdl_local = threading.local()
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        output_template = os.path.join(tmpdir, "transcript")
-
-        cmd = [
-            sys.executable, '-m', 'yt_dlp',
-            '--skip-download',
-            '--write-subs',
-            '--write-auto-subs',
-            '--sub-lang', ','.join(languages),
-            '--sub-format', 'vtt',
-            '-o', output_template,
-        ]
 
+class _QuietLogger:
+    """Swallow yt-dlp output; failures surface as exceptions instead."""
+
+    def debug(self, msg):
+        pass
+
+    info = warning = error = debug
+
+
+def get_ytdl(browser: str = None, cookies_file: str = None):
+    """Return a cached in-process YoutubeDL instance for these auth settings."""
+    try:
+        from yt_dlp import YoutubeDL
+    except ImportError:
+        raise RuntimeError("yt-dlp not found. Install with: pip install yt-dlp")
+
+    cache = getattr(_ytdl_local, 'instances', None)
+    if cache is None:
+        cache = _ytdl_local.instances = {}
+
+    key = (browser, cookies_file)
+    if key not in cache:
+        params = {
+            'skip_download': True,
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            'socket_timeout': 30,
+            'logger': _QuietLogger(),
+        }
         # Add authentication if specified
         if cookies_file:
-            cmd.extend(['--cookies', cookies_file])
+            params['cookiefile'] = cookies_file
         elif browser:
-            cmd.extend(['--cookies-from-browser', browser])
+            params['cookiesfrombrowser'] = (browser,)
+        cache[key] = YoutubeDL(params)
+    return cache[key]
 
-        cmd.append(url)
 
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        except FileNotFoundError:
-            raise RuntimeError("yt-dlp not found. Install with: pip install yt-dlp")
-        except subprocess.TimeoutExpired:
-            raise RuntimeError("yt-dlp timed out")
-
-        # Find subtitle file
-        subtitle_file = None
-        for lang in languages:
-            for pattern in [f"transcript.{lang}.vtt", f"transcript.{lang}.*.vtt"]:
-                matches = list(Path(tmpdir).glob(pattern))
-                if matches:
-                    subtitle_file = matches[0]
-                    break
-            if subtitle_file:
-                break
+def pick_subtitle_track(info: dict, languages: list[str]) -> tuple[str, dict, bool]:
+    """Choose (language, vtt format, is_auto) from yt-dlp info, manual subs first."""
+    manual = info.get('subtitles') or {}
+    auto = info.get('automatic_captions') or {}
 
-        if not subtitle_file:
-            files = list(Path(tmpdir).glob("*.vtt"))
-            if files:
-                subtitle_file = files[0]
-            else:
-                raise RuntimeError(f"No subtitles found. yt-dlp stderr: {result.stderr}")
+    def vtt(formats):
+        return next((f for f in formats if f.get('ext') == 'vtt'), None)
 
-        vtt_content = subtitle_file.read_text(encoding='utf-8')
-        transcript_text = parse_vtt_to_text(vtt_content, include_timestamps)
+    for lang in languages:
+        for tracks, is_auto in ((manual, False), (auto, True)):
+            for code in [lang] + sorted(c for c in tracks if c.startswith(f"{lang}-")):
+                fmt = vtt(tracks.get(code, ()))
+                if fmt:
+                    return code, fmt, is_auto
 
-        lang_match = re.search(r'\.([a-z]{2})\.', subtitle_file.name)
-        detected_lang = lang_match.group(1) if lang_match else languages[0]
-        is_auto = '.auto.' in subtitle_file.name
+    for tracks, is_auto in ((manual, False), (auto, True)):
+        for code, formats in tracks.items():
+            fmt = vtt(formats)
+            if fmt:
+                return code, fmt, is_auto
 
-        return transcript_text, {
-            'video_id': video_id,
-            'language': detected_lang,
-            'language_code': detected_lang,
-            'is_generated': is_auto,
-            'method': 'yt-dlp'
-        }
+    raise RuntimeError("No subtitles found")
 
 
-def get_transcript_api(
+def fetch_cues_ytdlp(
     video_id: str,
     languages: list[str] = None,
-    include_timestamps: bool = False
-) -> tuple[str, dict]:
-    """Fetch transcript using youtube-transcript-api (fallback)."""
+    browser: str = None,
+    cookies_file: str = None,
+    limiter: "HostRateLimiter" = None
+) -> tuple[dict, dict]:
+    """Fetch raw VTT cues using yt-dlp in-process (subtitles fetched into memory)."""
+    if languages is None:
+        languages = ['en']
+
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    ydl = get_ytdl(browser, cookies_file)
+
+    try:
+        if limiter:
+            limiter.wait(url)
+        info = ydl.extract_info(url, download=False, process=False)
+        lang, fmt, is_auto = pick_subtitle_track(info, languages)
+        if limiter:
+            limiter.wait(fmt['url'])
+        with ydl.urlopen(fmt['url']) as response:
+            vtt_content = response.read().decode('utf-8')
+    except RuntimeError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"yt-dlp failed: {e}")
+
+    return {'format': 'vtt', 'cues': vtt_content}, {
+        'video_id': video_id,
+        'language': lang.split('-')[0],
+        'language_code': lang,
+        'is_generated': is_auto,
+        'method': 'yt-dlp'
+    }
+
+
+def fetch_cues_api(
+    video_id: str,
+    languages: list[str] = None
+) -> tuple[dict, dict]:
+    """Fetch raw snippets using youtube-transcript-api (fallback)."""
     try:
         from youtube_transcript_api import YouTubeTranscriptApi
     except ImportError:
@@ -194,17 +395,8 @@ def get_transcript_api(
     ytt_api = YouTubeTranscriptApi()
     transcript = ytt_api.fetch(video_id, languages=languages)
 
-    if include_timestamps:
-        lines = []
-        for snippet in transcript:
-            minutes = int(snippet.start // 60)
-            seconds = int(snippet.start % 60)
-            lines.append(f"[{minutes:02d}:{seconds:02d}] {snippet.text}")
-        text = '\n'.join(lines)
-    else:
-        text = ' '.join([snippet.text for snippet in transcript])
-
-    return text, {
+    cues = [[snippet.start, snippet.duration, snippet.text] for snippet in transcript]
+    return {'format': 'snippets', 'cues': cues}, {
         'video_id': transcript.video_id,
         'language': transcript.language,
         'language_code': transcript.language_code,
@@ -213,66 +405,878 @@ def get_transcript_api(
     }
 
 
+class Transcript:
+    """Timed transcript segments held in parallel arrays.
+
+    starts/ends are integer milliseconds (array('i')), texts a list of
+    strings, built once from either backend's raw cues. Renderers yield the
+    output in pieces so a long transcript can be written out or chunked for
+    an LLM without building intermediate copies of the whole text.
+    """
+
+    __slots__ = ('starts', 'ends', 'texts', 'metadata')
+
+    def __init__(self, metadata: dict = None):
+        self.starts = array('i')
+        self.ends = array('i')
+        self.texts = []
+        self.metadata = metadata or {}
+
+    def append(self, start_ms: int, end_ms: int, text: str) -> None:
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.texts.append(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def from_raw(cls, raw: dict, metadata: dict = None) -> "Transcript":
+        """Build from cached/fetched raw cues (VTT text or API snippets)."""
+        transcript = cls(metadata)
+        if raw['format'] == 'vtt':
+            lines = raw['cues'].splitlines()
+            for start, end, text in iter_vtt_cues(lines, dedupe=transcript.metadata.get('is_generated')):
+                transcript.append(start, end, text)
+        else:
+            for start, duration, text in raw['cues']:
+                start_ms = int(start * 1000)
+                transcript.append(start_ms, start_ms + int(duration * 1000), text)
+        return transcript
+
+    def cleaned(self, extra_rules: tuple = ()) -> "Transcript":
+        """Copy with clean_transcript_text applied per segment, empty ones dropped."""
+        cleaner = get_cleaner(True, tuple(extra_rules))
+        transcript = Transcript(self.metadata)
+        for start, end, text in zip(self.starts, self.ends, self.texts):
+            text = cleaner.clean(text)
+            if text:
+                transcript.append(start, end, text)
+        return transcript
+
+    def link(self, ms: int) -> str:
+        """Deep link to ms into the video, or '' without a video ID."""
+        video_id = self.metadata.get('video_id')
+        return video_link(video_id, ms) if video_id else ''
+
+    def iter_passages(self, span_ms: int = INDEX_PASSAGE_MS):
+        """Yield (start_ms, end_ms, text) for runs of segments about span_ms long."""
+        first = 0
+        for i, start in enumerate(self.starts):
+            if i > first and start - self.starts[first] >= span_ms:
+                yield self.starts[first], self.ends[i - 1], ' '.join(self.texts[first:i])
+                first = i
+        if first < len(self.texts):
+            yield self.starts[first], self.ends[-1], ' '.join(self.texts[first:])
+
+    def iter_chunks(self, max_tokens: int = 1000):
+        """Yield dicts of consecutive segments that fit within max_tokens.
+
+        Each chunk carries its time anchors (start_ms, end_ms, start label and
+        deep link) so a summary can point back into the video. Tokens are
+        estimated at ~4 characters each; a single segment over budget becomes
+        its own chunk.
+        """
+        budget = max_tokens * 4
+        first = 0
+        size = 0
+        for i, text in enumerate(self.texts):
+            if size and size + 1 + len(text) > budget:
+                yield self._chunk(first, i)
+                first, size = i, 0
+            size += len(text) + (1 if size else 0)
+        if first < len(self.texts):
+            yield self._chunk(first, len(self.texts))
+
+    def _chunk(self, first: int, stop: int) -> dict:
+        text = ' '.join(self.texts[first:stop])
+        start = self.starts[first]
+        return {
+            'start_ms': start,
+            'end_ms': self.ends[stop - 1],
+            'start': format_ms(start),
+            'url': self.link(start),
+            'tokens': estimate_tokens(text),
+            'text': text,
+        }
+
+    def iter_format(self, fmt: str = 'text', chunk_tokens: int = 1000):
+        """Yield the transcript rendered as fmt, piece by piece."""
+        if fmt == 'text':
+            for i, text in enumerate(self.texts):
+                yield f" {text}" if i else text
+        elif fmt == 'timestamps':
+            sep = ''
+            for start, text in zip(self.starts, self.texts):
+                yield f"{sep}[{format_ms(start)}] {text}"
+                sep = '\n'
+        elif fmt == 'srt':
+            for i, (start, end, text) in enumerate(
+                    zip(self.starts, self.ends, self.texts), 1):
+                yield f"{i}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+        elif fmt == 'markdown':
+            yield from self._iter_markdown()
+        elif fmt == 'json':
+            yield '{'
+            for key, value in self.metadata.items():
+                yield f"\n  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},"
+            yield '\n  "segments": ['
+            for i, (start, end, text) in enumerate(zip(self.starts, self.ends, self.texts)):
+                segment = json.dumps(
+                    {'start': start / 1000, 'end': end / 1000, 'text': text},
+                    ensure_ascii=False
+                )
+                yield f"{',' if i else ''}\n    {segment}"
+            yield '\n  ]\n}\n'
+        elif fmt == 'chunks':
+            for chunk in self.iter_chunks(chunk_tokens):
+                yield json.dumps(chunk, ensure_ascii=False) + '\n'
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+
+    def _iter_markdown(self, paragraph_ms: int = 60000):
+        """Paragraphs of about a minute, each led by a (linked) timestamp."""
+        title = self.metadata.get('title')
+        if title:
+            yield f"# {title}\n\n"
+        para = []
+        para_start = None
+        for start, text in zip(self.starts, self.texts):
+            if para and start - para_start >= paragraph_ms:
+                yield self._paragraph(para_start, para) + '\n'
+                para = []
+            if not para:
+                para_start = start
+            para.append(text)
+        if para:
+            yield self._paragraph(para_start, para)
+
+    def _paragraph(self, start: int, texts: list[str]) -> str:
+        label = format_ms(start)
+        url = self.link(start)
+        anchor = f"[{label}]({url})" if url else f"[{label}]"
+        return f"**{anchor}** {' '.join(texts)}\n"
+
+    def render(self, fmt: str = 'text', chunk_tokens: int = 1000) -> str:
+        return ''.join(self.iter_format(fmt, chunk_tokens))
+
+
+def video_link(video_id: str, ms: int) -> str:
+    """youtu.be deep link that starts playback at ms."""
+    return f"https://youtu.be/{video_id}?t={ms // 1000}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def format_srt_time(ms: int) -> str:
+    """Format milliseconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    seconds, millis = divmod(ms, 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d},{millis:03d}"
+
+
+def render_cues(raw: dict, include_timestamps: bool = False, metadata: dict = None) -> str:
+    """Render raw cues (VTT or API snippets) as plain or [mm:ss] text.
+
+    metadata['is_generated'] decides whether rolling cues are collapsed.
+    """
+    return Transcript.from_raw(raw, metadata).render('timestamps' if include_timestamps else 'text')
+
+
+def get_transcript_ytdlp(
+    video_id: str,
+    languages: list[str] = None,
+    include_timestamps: bool = False,
+    browser: str = None,
+    cookies_file: str = None,
+    limiter: "HostRateLimiter" = None
+) -> tuple[str, dict]:
+    """Fetch transcript using yt-dlp."""
+    raw, metadata = fetch_cues_ytdlp(video_id, languages, browser, cookies_file, limiter)
+    return render_cues(raw, include_timestamps, metadata), metadata
+
+
+def get_transcript_api(
+    video_id: str,
+    languages: list[str] = None,
+    include_timestamps: bool = False
+) -> tuple[str, dict]:
+    """Fetch transcript using youtube-transcript-api (fallback)."""
+    raw, metadata = fetch_cues_api(video_id, languages)
+    return render_cues(raw, include_timestamps, metadata), metadata
+
+
+class TranscriptCache:
+    """On-disk cache of raw transcript cues.
+
+    Entries are keyed by video ID, requested language list and method, and
+    record whether the captions were auto-generated. Auto captions expire
+    sooner (AUTO_CACHE_TTL_DAYS) since a manual track may be uploaded later.
+    Rendering (timestamps, --clean) always happens on the cached cues, so
+    any output variant is served without refetching. Reads bump mtime;
+    evict() drops least recently used entries beyond max_bytes.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = CACHE_MAX_MB << 20,
+                 read: bool = True, write: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.read = read
+        self.write = write
+
+    def _path(self, video_id: str, languages: list[str], method: str) -> str:
+        langs = re.sub(r'[^A-Za-z0-9_+-]', '_', '+'.join(languages))
+        return os.path.join(self.root, f"{video_id}.{method}.{langs}.json")
+
+    def get(self, video_id: str, languages: list[str], method: str):
+        """Return (raw, metadata) if cached and fresh, else None."""
+        if not self.read:
+            return None
+        path = self._path(video_id, languages, method)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl_days = AUTO_CACHE_TTL_DAYS if entry['metadata'].get('is_generated') else CACHE_TTL_DAYS
+        if time.time() - entry['fetched_at'] > ttl_days * 86400:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            return None
+        os.utime(path)
+        return entry['raw'], entry['metadata']
+
+    def put(self, video_id: str, languages: list[str], method: str, raw: dict,
+            metadata: dict) -> None:
+        """Store an entry atomically (temp file + rename)."""
+        if not self.write:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(video_id, languages, method)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': time.time(), 'metadata': metadata, 'raw': raw}, f,
+                      ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def evict(self) -> None:
+        """Delete least recently used entries until under max_bytes."""
+        if not self.write or not os.path.isdir(self.root):
+            return
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.json'):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                total -= size
+
+
+class HostRateLimiter:
+    """Space out request starts so each host sees at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str) -> None:
+        """Block until a request to url's host may start."""
+        if not self.interval:
+            return
+        host = urlparse(url).netloc or url
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index of transcript passages, updated one video at a time.
+
+    Passages (about INDEX_PASSAGE_MS of consecutive segments, so phrases
+    spanning cue boundaries still match) live in a plain table keyed by
+    video; an external-content FTS5 table kept in sync by triggers indexes
+    their text. Re-adding a video replaces only its rows, and is skipped
+    when the raw cues are unchanged.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        digest TEXT NOT NULL,
+        language TEXT,
+        method TEXT,
+        is_generated INTEGER,
+        passages INTEGER,
+        indexed_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS passages (
+        id INTEGER PRIMARY KEY,
+        video_id TEXT NOT NULL,
+        start_ms INTEGER NOT NULL,
+        end_ms INTEGER NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS passages_video ON passages(video_id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+        text, content='passages', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+        INSERT INTO passages_fts(rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+        INSERT INTO passages_fts(passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Batch mode adds from worker threads; the lock serialises writers
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(raw: dict) -> str:
+        cues = raw['cues'] if raw['format'] == 'vtt' else json.dumps(raw['cues'])
+        return hashlib.sha1(cues.encode('utf-8')).hexdigest()
+
+    def add(self, raw: dict, metadata: dict) -> bool:
+        """Index (or re-index) one video; returns False if it was already current."""
+        video_id = metadata['video_id']
+        digest = self.digest(raw)
+        with self._lock:
+            row = self.db.execute(
+                'SELECT digest FROM videos WHERE video_id = ?', (video_id,)
+            ).fetchone()
+            if row and row[0] == digest:
+                return False
+            passages = [
+                (video_id, start, end, text)
+                for start, end, text in Transcript.from_raw(raw, metadata).iter_passages()
+            ]
+            with self.db:
+                self.db.execute('DELETE FROM passages WHERE video_id = ?', (video_id,))
+                self.db.executemany(
+                    'INSERT INTO passages (video_id, start_ms, end_ms, text) VALUES (?, ?, ?, ?)',
+                    passages
+                )
+                self.db.execute(
+                    'INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (video_id, digest, metadata.get('language'), metadata.get('method'),
+                     int(bool(metadata.get('is_generated'))), len(passages), time.time())
+                )
+        return True
+
+    def search(self, query: str, limit: int = 10, video_id: str = None) -> list[dict]:
+        """Return up to limit best-ranked (BM25) passages matching query."""
+        sql = """
+            SELECT p.video_id, p.start_ms, p.end_ms,
+                   snippet(passages_fts, 0, '**', '**', '…', 16), bm25(passages_fts)
+            FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid
+            WHERE passages_fts MATCH ?{}
+            ORDER BY rank LIMIT ?
+        """.format(' AND p.video_id = ?' if video_id else '')
+        params = [video_id] if video_id else []
+        try:
+            rows = self.db.execute(sql, [query, *params, limit]).fetchall()
+        except sqlite3.OperationalError:
+            # Not valid FTS5 syntax (stray quotes, colons, ...): match the words as typed
+            terms = ' '.join('"{}"'.format(t.replace('"', '""')) for t in query.split())
+            rows = self.db.execute(sql, [terms, *params, limit]).fetchall()
+        return [
+            {'video_id': vid, 'start_ms': start, 'end_ms': end, 'start': format_ms(start),
+             'url': video_link(vid, start), 'snippet': snippet, 'score': round(-score, 3)}
+            for vid, start, end, snippet, score in rows
+        ]
+
+    def stats(self) -> tuple[int, int]:
+        """(videos, passages) currently indexed."""
+        videos, = self.db.execute('SELECT COUNT(*) FROM videos').fetchone()
+        passages, = self.db.execute('SELECT COUNT(*) FROM passages').fetchone()
+        return videos, passages
+
+
+class _HedgeWorkers:
+    """Daemon threads that run hedged fetches and live across races.
+
+    A worker keeps its thread-local YoutubeDL (see get_ytdl), so racing many
+    videos reuses instances instead of building one (and reloading browser
+    cookies) per fetch. Idle workers are reused; new ones start only up to
+    max_workers, so abandoned losers can't pile up. Being daemons, a loser
+    still in flight never holds up exit.
+    """
+
+    def __init__(self, max_workers: int = HEDGE_WORKERS):
+        self.max_workers = max_workers
+        self.jobs = queue.Queue()
+        self.idle = threading.Semaphore(0)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def submit(self, job) -> None:
+        self.jobs.put(job)
+        if self.idle.acquire(blocking=False):
+            return
+        with self.lock:
+            if self.count < self.max_workers:
+                self.count += 1
+                threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self) -> None:
+        while True:
+            self.jobs.get()()
+            self.idle.release()
+
+
+_hedge_workers = _HedgeWorkers()
+
+
+def race_fetchers(
+    video_id: str,
+    languages: list[str],
+    browser: str = None,
+    cookies_file: str = None,
+    limiter: HostRateLimiter = None,
+    delay: float = DEFAULT_HEDGE_DELAY,
+    log=None
+) -> tuple[str, dict, dict]:
+    """Race yt-dlp against the API; return (method, raw, metadata) of the first valid result.
+
+    The API starts after delay seconds (0 = immediately), or as soon as yt-dlp
+    fails. The loser is abandoned: an API call still waiting out its delay is
+    cancelled, and a fetch already in flight runs on in its worker with its
+    result discarded. Both sides run on the shared _hedge_workers.
+    """
+    results = queue.Queue()
+    done = threading.Event()
+    wake = threading.Event()
+
+    def run(method, fetch):
+        try:
+            raw, metadata = fetch()
+            if not raw['cues']:
+                raise RuntimeError("empty transcript")
+            results.put((method, raw, metadata, None))
+        except Exception as e:
+            results.put((method, None, None, e))
+
+    def ytdlp():
+        run('ytdlp', lambda: fetch_cues_ytdlp(
+            video_id, languages, browser=browser, cookies_file=cookies_file,
+            limiter=limiter
+        ))
+
+    def api():
+        wake.wait(delay)
+        if done.is_set():
+            return
+        if limiter:
+            limiter.wait(YOUTUBE_HOST)
+        run('api', lambda: fetch_cues_api(video_id, languages))
+
+    start = time.monotonic()
+    for target in (ytdlp, api):
+        _hedge_workers.submit(target)
+
+    errors = []
+    for _ in range(2):
+        method, raw, metadata, error = results.get()
+        if error is None:
+            done.set()
+            wake.set()
+            if log:
+                log(f"[Hedge: {metadata['method']} won after {time.monotonic() - start:.1f}s]")
+            return method, raw, metadata
+        label = 'yt-dlp' if method == 'ytdlp' else 'youtube-transcript-api'
+        errors.append(f"{label}: {error}")
+        if log:
+            log(f"[Hedge: {label} failed: {error}]")
+        # Don't make the API sit out the rest of its delay
+        wake.set()
+
+    raise RuntimeError(f"All methods failed ({'; '.join(errors)})")
+
+
+def fetch_raw(
+    video_id: str,
+    languages: list[str] = None,
+    method: str = 'auto',
+    browser: str = None,
+    cookies_file: str = None,
+    limiter: HostRateLimiter = None,
+    cache: TranscriptCache = None,
+    verbose: bool = True,
+    hedge: bool = False,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    index: TranscriptIndex = None
+) -> tuple[dict, dict]:
+    """Fetch one video's raw cues with yt-dlp, falling back to the API in auto mode.
+
+    With hedge (auto mode only), the two methods race instead of running one
+    after the other; metadata['method'] records which one won. With index,
+    the transcript is also added to the search index.
+    """
+    def log(msg):
+        if verbose:
+            print(msg, file=sys.stderr)
+
+    if languages is None:
+        languages = ['en']
+
+    raw = None
+    metadata = None
+
+    if cache:
+        for m in (['ytdlp', 'api'] if method == 'auto' else [method]):
+            hit = cache.get(video_id, languages, m)
+            if hit:
+                raw, metadata = hit
+                log(f"[Using cached {metadata['method']} transcript]")
+                break
+
+    if raw is None and method == 'auto' and hedge:
+        used, raw, metadata = race_fetchers(
+            video_id, languages, browser=browser, cookies_file=cookies_file,
+            limiter=limiter, delay=hedge_delay, log=log
+        )
+        if cache:
+            cache.put(video_id, languages, used, raw, metadata)
+
+    # Try yt-dlp first
+    if raw is None and method in ['auto', 'ytdlp']:
+        try:
+            raw, metadata = fetch_cues_ytdlp(
+                video_id, languages, browser=browser, cookies_file=cookies_file,
+                limiter=limiter
+            )
+            log("[Using yt-dlp]")
+            if cache:
+                cache.put(video_id, languages, 'ytdlp', raw, metadata)
+        except Exception as e:
+            if method == 'ytdlp':
+                raise
+            log(f"[yt-dlp failed: {e}]")
+            log("[Trying youtube-transcript-api...]")
+
+    # Fallback to API
+    if raw is None and method in ['auto', 'api']:
+        if limiter:
+            limiter.wait(YOUTUBE_HOST)
+        raw, metadata = fetch_cues_api(video_id, languages)
+        log("[Using youtube-transcript-api]")
+        if cache:
+            cache.put(video_id, languages, 'api', raw, metadata)
+
+    if raw is None:
+        raise RuntimeError("Could not fetch transcript")
+
+    if index and index.add(raw, metadata):
+        log("[Added to search index]")
+    return raw, metadata
+
+
+def fetch_transcript(
+    video_id: str,
+    languages: list[str] = None,
+    include_timestamps: bool = False,
+    clean: bool = False,
+    output_format: str = 'text',
+    chunk_tokens: int = 1000,
+    clean_rules: tuple = (),
+    **fetch_kwargs
+) -> tuple[str, dict]:
+    """Fetch one transcript and render it (see fetch_raw for fetch options).
+
+    output_format 'text' is the plain (or with include_timestamps, [mm:ss])
+    transcript; any other Transcript format is rendered from the segments,
+    with --clean applied per segment. clean_rules are extra (pattern,
+    replacement) cleanup rules, applied after the built-in ones.
+    """
+    raw, metadata = fetch_raw(video_id, languages, **fetch_kwargs)
+    if output_format == 'text':
+        text = render_cues(raw, include_timestamps, metadata)
+        if clean:
+            text = clean_transcript_text(text, extra_rules=clean_rules)
+        return text, metadata
+
+    transcript = load_transcript(raw, metadata, clean, clean_rules)
+    return transcript.render(output_format, chunk_tokens), metadata
+
+
+def load_transcript(raw: dict, metadata: dict, clean: bool = False,
+                    clean_rules: tuple = ()) -> Transcript:
+    """Build the segment model from raw cues, optionally cleaned."""
+    transcript = Transcript.from_raw(raw, metadata)
+    return transcript.cleaned(clean_rules) if clean else transcript
+
+
+def collect_video_ids(source: str) -> list[str]:
+    """Expand a playlist/channel URL or a file of IDs/URLs into video IDs."""
+    if os.path.isfile(source):
+        with open(source, encoding='utf-8') as f:
+            items = [
+                line.strip() for line in f
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+        return list(dict.fromkeys(extract_video_id(item) for item in items))
+
+    try:
+        from yt_dlp import YoutubeDL
+    except ImportError:
+        raise RuntimeError("yt-dlp not found. Install with: pip install yt-dlp")
+
+    # Flat extraction lists the entries without resolving each video
+    params = {'extract_flat': 'in_playlist', 'quiet': True, 'no_warnings': True,
+              'logger': _QuietLogger()}
+    with YoutubeDL(params) as ydl:
+        info = ydl.extract_info(source, download=False)
+
+    ids = []
+    for entry in info.get('entries') or [info]:
+        if entry and entry.get('id') and re.fullmatch(r'[a-zA-Z0-9_-]{11}', entry['id']):
+            ids.append(entry['id'])
+    return list(dict.fromkeys(ids))
+
+
+def run_batch(video_ids: list[str], output: str, concurrency: int = 4,
+              rate: float = 2.0, **fetch_kwargs) -> int:
+    """Fetch transcripts concurrently, streaming each result as it completes.
+
+    output is either a .jsonl file (one record per video, text included) or a
+    directory (<video_id>.<ext> per transcript, ext from FORMAT_EXTENSIONS,
+    plus index.jsonl). Failures are
+    recorded and the batch carries on. Returns the number of failures.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    jsonl_mode = output.endswith('.jsonl')
+    if jsonl_mode:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        index_path = output
+    else:
+        os.makedirs(output, exist_ok=True)
+        index_path = os.path.join(output, 'index.jsonl')
+
+    limiter = HostRateLimiter(rate)
+
+    def fetch(video_id):
+        start = time.monotonic()
+        try:
+            text, metadata = fetch_transcript(
+                video_id, limiter=limiter, verbose=False, **fetch_kwargs
+            )
+            return video_id, text, metadata, None, time.monotonic() - start
+        except Exception as e:
+            return video_id, None, None, str(e), time.monotonic() - start
+
+    failed = 0
+    total = len(video_ids)
+    rate_desc = f"{rate:g} req/s per host" if rate > 0 else "no rate limit"
+    print(f"Fetching {total} transcripts ({concurrency} at a time, {rate_desc})...",
+          file=sys.stderr)
+    with open(index_path, 'a', encoding='utf-8') as index, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(fetch, video_id) for video_id in video_ids]
+        for done, future in enumerate(as_completed(futures), 1):
+            video_id, text, metadata, error, seconds = future.result()
+            record = {'video_id': video_id, 'seconds': round(seconds, 2)}
+            if error:
+                failed += 1
+                record.update(status='error', error=error)
+                print(f"  [{done}/{total}] ✗ {video_id}: {error}", file=sys.stderr)
+            else:
+                record.update(status='ok', **metadata)
+                if jsonl_mode:
+                    record['text'] = text
+                else:
+                    ext = FORMAT_EXTENSIONS[fetch_kwargs.get('output_format', 'text')]
+                    path = os.path.join(output, f"{video_id}.{ext}")
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    record['output'] = path
+                print(f"  [{done}/{total}] ✓ {video_id} ({metadata['method']}, "
+                      f"{len(text):,} chars)", file=sys.stderr)
+            index.write(json.dumps(record, ensure_ascii=False) + '\n')
+            index.flush()
+
+    print(f"\nDone: {total - failed} fetched, {failed} failed → {index_path}", file=sys.stderr)
+    return failed
+
+
+def search_main(argv: list[str]) -> None:
+    """`search` subcommand: query the local transcript index."""
+    parser = argparse.ArgumentParser(
+        prog='extract_transcript.py search',
+        description='Search transcripts added with --index (SQLite FTS5 syntax: '
+                    'phrases in quotes, AND/OR/NOT, prefix*)'
+    )
+    parser.add_argument('query', nargs='+', help='Search terms')
+    parser.add_argument('-n', '--limit', type=int, default=10,
+                        help='Maximum hits (default: 10)')
+    parser.add_argument('--video', help='Only search this video ID or URL')
+    parser.add_argument('--json', action='store_true', help='Print hits as JSON lines')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(INDEX_PATH):
+        print(f"Error: no index at {INDEX_PATH} (fetch with --index first)", file=sys.stderr)
+        sys.exit(1)
+
+    index = TranscriptIndex()
+    start = time.perf_counter()
+    hits = index.search(' '.join(args.query), limit=max(args.limit, 1),
+                        video_id=extract_video_id(args.video) if args.video else None)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        for hit in hits:
+            print(json.dumps(hit, ensure_ascii=False))
+    else:
+        for rank, hit in enumerate(hits, 1):
+            print(f"{rank:>3}. [{hit['start']}] {hit['url']}\n     {hit['snippet']}")
+    videos, passages = index.stats()
+    print(f"\n{len(hits)} hit{'s' if len(hits) != 1 else ''} in {elapsed_ms:.1f} ms "
+          f"({videos:,} videos, {passages:,} passages indexed)", file=sys.stderr)
+    sys.exit(0 if hits else 1)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        search_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description='Extract transcripts from YouTube videos',
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
 
-    parser.add_argument('video', help='YouTube video ID or URL')
+    parser.add_argument('video',
+                        help='YouTube video ID or URL (with --batch: playlist/channel URL '
+                             'or a file of IDs/URLs)')
     parser.add_argument('-l', '--language', nargs='+', default=['en'],
                         help='Language code(s) in priority order (default: en)')
     parser.add_argument('-t', '--timestamps', action='store_true',
                         help='Include timestamps in output')
     parser.add_argument('-c', '--clean', action='store_true',
                         help='Clean transcript text (remove [Music], etc.)')
-    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    parser.add_argument('--strip', action='append', default=[], metavar='REGEX',
+                        help='Extra pattern to remove when cleaning (repeatable, implies --clean)')
+    parser.add_argument('-o', '--output',
+                        help='Output file (default: stdout; with --batch: directory or .jsonl file)')
+    parser.add_argument('-f', '--format', choices=list(FORMAT_EXTENSIONS), default='text',
+                        help='Output format: text, json (segments + metadata), srt, markdown, '
+                             'or chunks (JSONL of token-budgeted chunks with time anchors)')
+    parser.add_argument('--chunk-tokens', type=int, default=1000,
+                        help='Approximate tokens per chunk with --format chunks (default: 1000)')
     parser.add_argument('--method', choices=['auto', 'ytdlp', 'api'], default='auto',
                         help='Method: auto, ytdlp, or api')
     parser.add_argument('--browser', choices=['chrome', 'firefox', 'safari', 'edge', 'brave'],
                         help='Browser to extract cookies from (for yt-dlp auth)')
     parser.add_argument('--cookies', help='Path to Netscape-format cookies.txt file')
+    parser.add_argument('--hedge', action='store_true',
+                        help='Race yt-dlp against youtube-transcript-api; first valid transcript wins')
+    parser.add_argument('--hedge-delay', type=float, default=DEFAULT_HEDGE_DELAY,
+                        help=f'With --hedge, seconds before the API joins the race '
+                             f'(default: {DEFAULT_HEDGE_DELAY:g}, 0 = start both at once)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached transcripts and refetch (still updates the cache)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Don't read or write the transcript cache")
+    parser.add_argument('--index', action='store_true',
+                        help='Add fetched transcripts to the local search index '
+                             '(query with: extract_transcript.py search ...)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Fetch every video in a playlist, channel, or ID file')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Videos fetched at once in --batch mode (default: 4)')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='Max requests per second per host in --batch mode (default: 2, 0 = unlimited)')
 
     args = parser.parse_args()
-    video_id = extract_video_id(args.video)
 
-    try:
-        text = None
-        metadata = None
+    clean_rules = []
+    for pattern in args.strip:
+        try:
+            clean_rules.append((re.compile(pattern), ''))
+        except re.error as e:
+            parser.error(f"invalid --strip pattern {pattern!r}: {e}")
+    clean_rules = tuple(clean_rules)
 
-        # Try yt-dlp first
-        if args.method in ['auto', 'ytdlp']:
-            try:
-                text, metadata = get_transcript_ytdlp(
-                    video_id, args.language, args.timestamps,
-                    browser=args.browser, cookies_file=args.cookies
-                )
-                print(f"[Using yt-dlp]", file=sys.stderr)
-            except Exception as e:
-                if args.method == 'ytdlp':
-                    raise
-                print(f"[yt-dlp failed: {e}]", file=sys.stderr)
-                print(f"[Trying youtube-transcript-api...]", file=sys.stderr)
-
-        # Fallback to API
-        if text is None and args.method in ['auto', 'api']:
-            text, metadata = get_transcript_api(video_id, args.language, args.timestamps)
-            print(f"[Using youtube-transcript-api]", file=sys.stderr)
-
-        if text is None:
-            print("Error: Could not fetch transcript", file=sys.stderr)
+    cache = None
+    if not args.no_cache:
+        cache = TranscriptCache(read=not args.refresh)
+
+    fetch_kwargs = dict(
+        cache=cache,
+        languages=args.language,
+        include_timestamps=args.timestamps,
+        method=args.method,
+        browser=args.browser,
+        cookies_file=args.cookies,
+        clean=args.clean or bool(clean_rules),
+        clean_rules=clean_rules,
+        output_format=args.format,
+        chunk_tokens=max(args.chunk_tokens, 1),
+        hedge=args.hedge,
+        hedge_delay=max(args.hedge_delay, 0.0),
+        index=TranscriptIndex() if args.index else None,
+    )
+
+    if args.batch:
+        if not args.output:
+            parser.error('--batch needs -o DIR or -o FILE.jsonl')
+        try:
+            video_ids = collect_video_ids(args.video)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
+        if not video_ids:
+            print("Error: no videos found", file=sys.stderr)
+            sys.exit(1)
+        failed = run_batch(video_ids, args.output, concurrency=max(args.concurrency, 1),
+                           rate=args.rate, **fetch_kwargs)
+        if cache:
+            cache.evict()
+        sys.exit(1 if failed == len(video_ids) else 0)
 
-        if args.clean:
-            text = clean_transcript_text(text)
+    video_id = extract_video_id(args.video)
+
+    try:
+        if args.format == 'text':
+            text, metadata = fetch_transcript(video_id, **fetch_kwargs)
+            pieces = [text]
+        else:
+            raw, metadata = fetch_raw(
+                video_id, args.language, method=args.method, browser=args.browser,
+                cookies_file=args.cookies, cache=cache, hedge=args.hedge,
+                hedge_delay=fetch_kwargs['hedge_delay'], index=fetch_kwargs['index']
+            )
+            transcript = load_transcript(raw, metadata, fetch_kwargs['clean'], clean_rules)
+            pieces = transcript.iter_format(args.format, fetch_kwargs['chunk_tokens'])
+        if cache:
+            cache.evict()
 
+        # Segment formats are written piece by piece, never joined in memory
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
-                f.write(text)
+                f.writelines(pieces)
             print(f"Saved to {args.output}", file=sys.stderr)
         else:
-            print(text)
+            sys.stdout.writelines(pieces)
+            if args.format == 'text':
+                sys.stdout.write('\n')
 
         print(f"\n--- Metadata ---", file=sys.stderr)
         print(f"Video ID: {metadata['video_id']}", file=sys.stderr)